@@ -0,0 +1,97 @@
+# ann_index.py - Optional approximate candidate retrieval (random-projection LSH) for JobIndex
+#
+#   JOBREC_ANN_PROBES=4 streamlit run textbox_resume_match.py     # approximate mode, 4 buckets per table
+#   python benchmark.py --stages top_k top_k_ann --ann-probes 1 2 4 8   # recall / latency trade-off
+#
+# Each job's term vector (the vectorizer vocabulary of the model bundle) is hashed by the signs of
+# ANN_BITS random projections in each of ANN_TABLES tables; jobs pointing the same way as the user land
+# in the same bucket. A query reads its bucket in every table plus the probes - 1 neighbouring buckets
+# whose bits were closest to flipping (multi-probe LSH). Only that shortlist is then scored exactly, so
+# more probes = higher recall and a longer shortlist. 0 probes keeps the exact path.
+import os
+import time
+
+import numpy as np
+
+ANN_TABLES = 8
+ANN_BITS = 14
+ANN_PROBES = int(os.environ.get("JOBREC_ANN_PROBES", "0"))
+# Queries whose posting lists hold fewer jobs than this are scored exactly even in approximate mode
+ANN_MIN_CANDIDATES = 20_000
+ANN_SEED = 0
+
+
+class LshIndex:
+    """Sign-random-projection hash tables over the rows of a job x term matrix."""
+
+    def __init__(self, job_vectors, n_tables=ANN_TABLES, n_bits=ANN_BITS, seed=ANN_SEED, block_size=65_536):
+        self.n_tables, self.n_bits = n_tables, n_bits
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((job_vectors.shape[1], n_tables * n_bits)).astype(np.float32)
+        self.weights = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+        codes = np.empty((n_tables, job_vectors.shape[0]), dtype=np.int64)
+        for start in range(0, job_vectors.shape[0], block_size):
+            projected = np.asarray(job_vectors[start:start + block_size] @ self.planes)
+            codes[:, start:start + len(projected)] = self.codes(projected).T
+
+        # Per table: jobs sorted by bucket code, the distinct codes and where each bucket starts
+        self.order, self.keys, self.bounds = [], [], []
+        for table_codes in codes:
+            order = np.argsort(table_codes, kind="stable").astype(np.int32)
+            keys, starts = np.unique(table_codes[order], return_index=True)
+            self.order.append(order)
+            self.keys.append(keys)
+            self.bounds.append(np.append(starts, len(order)))
+
+    def codes(self, projected):
+        # (rows, tables * bits) projections -> (rows, tables) bucket codes
+        bits = (projected > 0).reshape(len(projected), self.n_tables, self.n_bits)
+        return bits @ self.weights
+
+    def candidates(self, user_vec, probes=ANN_PROBES):
+        """Sorted rows sharing a probed bucket with user_vec (1 x terms) in any table."""
+        projected = np.asarray(user_vec @ self.planes).reshape(self.n_tables, self.n_bits)
+        base = self.codes(projected.reshape(1, -1))[0]
+        # Probe the buckets reached by flipping the probes - 1 least certain bits of each table
+        flips = np.argsort(np.abs(projected), axis=1)[:, :max(probes - 1, 0)]
+        lists = []
+        for t in range(self.n_tables):
+            codes = np.concatenate([[base[t]], base[t] ^ self.weights[flips[t]]])
+            pos = np.searchsorted(self.keys[t], codes)
+            for p, code in zip(pos, codes):
+                if p < len(self.keys[t]) and self.keys[t][p] == code:
+                    lists.append(self.order[t][self.bounds[t][p]:self.bounds[t][p + 1]])
+        return np.unique(np.concatenate(lists)).astype(np.int64) if lists else np.zeros(0, dtype=np.int64)
+
+
+def recall_report(job_index, queries, k=10, probes=(1, 2, 4, 8)):
+    """Recall@k and latency of approximate select_rows against the exact path, per probe setting.
+
+    Recall counts the exact top-k jobs with a non-zero Final Score that the approximate path also
+    returns; zero-score padding rows are not counted. job_index.lsh() is built before timing.
+    """
+    job_index.lsh()
+    exact, exact_seconds = [], []
+    for tokens in queries:
+        start = time.perf_counter()
+        rows = job_index.select_rows(tokens, k, ann_probes=0)
+        exact_seconds.append(time.perf_counter() - start)
+        final_score = job_index.scores(tokens, rows)[-1]
+        exact.append(set(rows[final_score > 0].tolist()))
+
+    report = []
+    for n_probes in probes:
+        recalls, seconds = [], []
+        for tokens, truth in zip(queries, exact):
+            start = time.perf_counter()
+            rows = job_index.select_rows(tokens, k, ann_probes=n_probes)
+            seconds.append(time.perf_counter() - start)
+            if truth:
+                recalls.append(len(truth.intersection(rows.tolist())) / len(truth))
+        report.append({
+            "probes": n_probes,
+            "recall_at_k": float(np.mean(recalls)) if recalls else 1.0,
+            "p50_ms": float(np.percentile(seconds, 50) * 1000),
+            "exact_p50_ms": float(np.percentile(exact_seconds, 50) * 1000),
+        })
+    return report
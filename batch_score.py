@@ -0,0 +1,157 @@
+# batch_score.py - Headless batch scoring of a directory of resumes against the job catalogue
+#
+#   python batch_score.py resumes/ -o results.jsonl -k 10 --workers 8
+#   python batch_score.py resumes/ -o results.parquet --format parquet
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from job_index import detect_skill_column, load_jobs_df, ranking_columns, result_records
+from model_bundle import open_job_index
+from nlp_resources import STOP_WORDS
+from resume_parser import extract_skills_from_chunks, iter_resume_text
+from skill_extractor import SkillMatcher
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+# Per worker process state, set once by init_worker (the bundle arrays are memory-mapped,
+# so all workers share one copy of the job matrix)
+_job_index = None
+_matcher = None
+
+
+def find_resumes(resume_dir):
+    paths = []
+    for root, _, files in os.walk(resume_dir):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(RESUME_EXTENSIONS))
+    return sorted(paths)
+
+def init_worker():
+    global _job_index, _matcher
+    # No facet filters here, so only the skills and the result fields are decoded
+    jobs_df, jobs_path = load_jobs_df(ranking_columns(facets=False))
+    _job_index = open_job_index(jobs_df, detect_skill_column(jobs_df), jobs_path)
+    _matcher = SkillMatcher(_job_index.skill_names, STOP_WORDS)
+
+def score_resume(path, k):
+    result = {"resume": path, "skills": [], "jobs": [], "error": None}
+    try:
+        # Resumes are already spread over worker processes, so pages are parsed in-process
+        with open(path, "rb") as f:
+            skills = extract_skills_from_chunks(iter_resume_text(f, path, workers=1), _matcher)
+        result["skills"] = skills
+        if skills:
+            result["jobs"] = result_records(_job_index.top_k(skills, k))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# --------------------------
+# Output writers
+# --------------------------
+class JsonlWriter:
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8")
+
+    def write(self, result):
+        self.f.write(json.dumps(result) + "\n")
+
+    def close(self):
+        self.f.close()
+
+class ParquetWriter:
+    # One row per (resume, ranked job); resumes without matches keep a single row with rank 0
+    def __init__(self, path, batch_size=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output needs pyarrow (pip install pyarrow), or use --format jsonl")
+        self.pa, self.pq = pa, pq
+        self.path, self.batch_size = path, batch_size
+        self.rows, self.writer = [], None
+
+    def write(self, result):
+        base = {"resume": result["resume"], "skills": ", ".join(result["skills"]), "error": result["error"]}
+        jobs = result["jobs"] or [{"rank": 0}]
+        self.rows.extend({**base, **job} for job in jobs)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        columns = ["resume", "skills", "error", "rank", "row", "job_title", "company", "location",
+                   "matched_skills", "match_percent", "ml_score", "final_score"]
+        table = self.pa.Table.from_pylist([{c: r.get(c) for c in columns} for r in self.rows],
+                                          schema=self.schema())
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def schema(self):
+        pa = self.pa
+        return pa.schema([("resume", pa.string()), ("skills", pa.string()), ("error", pa.string()),
+                          ("rank", pa.int32()), ("row", pa.int64()), ("job_title", pa.string()),
+                          ("company", pa.string()), ("location", pa.string()), ("matched_skills", pa.string()),
+                          ("match_percent", pa.float64()), ("ml_score", pa.float64()),
+                          ("final_score", pa.float64())])
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+# --------------------------
+# CLI
+# --------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank jobs for every PDF/DOCX resume in a directory.")
+    parser.add_argument("resume_dir")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl")
+    parser.add_argument("--format", choices=["jsonl", "parquet"],
+                        help="output format (default: from the output file extension)")
+    parser.add_argument("-k", "--top-k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=8, help="resumes handed to a worker at a time")
+    parser.add_argument("--progress-every", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    paths = find_resumes(args.resume_dir)
+    if not paths:
+        sys.exit(f"No .pdf or .docx files found under {args.resume_dir}")
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    writer = ParquetWriter(args.output) if fmt == "parquet" else JsonlWriter(args.output)
+    print(f"Scoring {len(paths)} resumes with {args.workers} workers -> {args.output}", file=sys.stderr)
+
+    start = time.perf_counter()
+    done = failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+            # map() yields results in input order as they complete, so output is streamed
+            for result in pool.map(score_resume, paths, [args.top_k] * len(paths), chunksize=args.chunksize):
+                writer.write(result)
+                done += 1
+                failed += result["error"] is not None
+                if done % args.progress_every == 0 or done == len(paths):
+                    elapsed = time.perf_counter() - start
+                    rate = done / elapsed if elapsed else 0.0
+                    eta = (len(paths) - done) / rate if rate else 0.0
+                    print(f"{done}/{len(paths)} resumes  {rate:.1f}/s  {failed} failed  ETA {eta:.0f}s",
+                          file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {done} resumes in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f}/s), {failed} failed",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
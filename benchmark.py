@@ -0,0 +1,222 @@
+# benchmark.py - Latency / throughput / memory benchmark of the ranking hot path
+#
+#   python benchmark.py                                  # 10k, 100k and 1M synthetic jobs
+#   python benchmark.py --sizes 10000 --queries 20 --stages top_k rank_jobs
+#   python benchmark.py --compare bench_results/<older commit>.json
+#   python benchmark.py --stages top_k top_k_ann --ann-probes 1 2 4 8     # approximate mode recall
+#
+# Catalogues come from synthetic_catalogue.py (seeded, cached under bench_data/). Each stage is
+# timed call by call (p50/p99 latency, throughput), then run once more under tracemalloc for its
+# peak Python/NumPy allocation. Results are written to bench_results/<git commit>.json.
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ann_index import recall_report
+from job_index import calculate_match, detect_skill_column
+from job_store import build_job_store, load_job_store, read_jobs_csv
+from model_bundle import build_bundle, open_job_index
+from nlp_resources import STOP_WORDS, get_nlp
+from resume_parser import nlp_extract_skills_from_text
+from similar_jobs import build_neighbours, similar_jobs
+from skill_extractor import SkillMatcher
+from synthetic_catalogue import catalogue_csv
+
+SIZES = [10_000, 100_000, 1_000_000]
+STAGES = ["load", "load_store", "build_bundle", "open_index", "calculate_match", "rank_jobs", "top_k", "top_k_batch",
+          "top_k_ann", "extract", "neighbours", "recommend"]
+RESULTS_DIR = "bench_results"
+# calculate_match is the per-row reference loop and build_neighbours is quadratic in the worst case;
+# both are run on bounded inputs so the larger sizes finish
+REFERENCE_QUERIES = 3
+NEIGHBOUR_MAX_JOBS = 20_000
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def measure(fn, inputs, items_per_call=1, memory=True):
+    """Time fn over every input, then once more under tracemalloc; returns (stats, last result)."""
+    latencies, result = [], None
+    for x in inputs:
+        start = time.perf_counter()
+        result = fn(x)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+    stats = {
+        "calls": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "throughput_per_s": float(len(latencies) * items_per_call / latencies.sum()) if latencies.sum() else 0.0,
+        "peak_mb": None,
+    }
+    if memory:
+        tracemalloc.start()
+        fn(inputs[0])
+        stats["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return stats, result
+
+def sample_queries(skill_names, skill_freq, n, seed):
+    # 1-5 skills per user, drawn like job skills are (common skills more often)
+    rng = np.random.default_rng(seed)
+    p = skill_freq / skill_freq.sum()
+    return [list(rng.choice(skill_names, size=min(rng.integers(1, 6), len(skill_names)), replace=False, p=p))
+            for _ in range(n)]
+
+def resume_texts(queries, seed):
+    rng = np.random.default_rng(seed)
+    filler = ("Experienced professional with a record of delivering projects. Worked across teams on "
+              "planning, reporting and stakeholder communication. ").split()
+    texts = []
+    for skills in queries:
+        words = list(rng.choice(filler, size=120)) + [f"{s}," for s in skills]
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    return texts
+
+
+# --------------------------
+# One catalogue size
+# --------------------------
+def run_size(n_jobs, stages, n_queries, k, batch_size, seed, memory, ann_probes):
+    path = catalogue_csv(n_jobs, seed)
+    results = {}
+
+    def run(stage, fn, inputs, items_per_call=1):
+        if stage not in stages:
+            return None
+        stats, result = measure(fn, inputs, items_per_call, memory)
+        results[stage] = stats
+        peak = f"{stats['peak_mb']:9.1f} MB" if stats["peak_mb"] is not None else ""
+        print(f"  {stage:<16} p50 {stats['p50_ms']:10.2f} ms  p99 {stats['p99_ms']:10.2f} ms  "
+              f"{stats['throughput_per_s']:12.1f}/s  {peak}")
+        return result
+
+    print(f"{n_jobs} jobs ({path})")
+    jobs_df = read_jobs_csv(path)
+    run("load", read_jobs_csv, [path])
+    skill_col = detect_skill_column(jobs_df)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Memory-mapped: peak_mb only counts what is decoded, not the mapped column files
+        store_dir = os.path.join(tmp, "job_store")
+        build_job_store(jobs_df, path, store_dir)
+        run("load_store", lambda d: load_job_store(path, store_dir=d), [store_dir])
+        bundle_dir = os.path.join(tmp, "model_bundle")
+        if "build_bundle" in stages:
+            run("build_bundle", lambda d: build_bundle(jobs_df, skill_col, path, d), [bundle_dir])
+        else:
+            build_bundle(jobs_df, skill_col, path, bundle_dir)
+        job_index = open_job_index(jobs_df, skill_col, path, bundle_dir)
+        run("open_index", lambda d: open_job_index(jobs_df, skill_col, path, d), [bundle_dir])
+
+        skill_freq = np.asarray(job_index.skill_matrix.sum(axis=0)).ravel().astype(float)
+        queries = sample_queries(job_index.skill_names, skill_freq, n_queries, seed)
+        skill_texts = jobs_df[skill_col].tolist()
+        run("calculate_match", lambda q: [calculate_match(s, q) for s in skill_texts],
+            queries[:REFERENCE_QUERIES])
+        run("rank_jobs", job_index.rank_jobs, queries)
+        run("top_k", lambda q: job_index.top_k(q, k), queries)
+        batches = [[(q, k, None) for q in queries[i:i + batch_size]] for i in range(0, len(queries), batch_size)]
+        run("top_k_batch", job_index.top_k_batch, batches, batch_size)
+        if "top_k_ann" in stages:
+            # Approximate mode: recall@k against the exact path and p50 latency, per probe setting
+            for row in recall_report(job_index, queries, k, ann_probes):
+                print(f"  top_k_ann probes={row['probes']:<3} recall@{k} {row['recall_at_k']:.3f}  "
+                      f"p50 {row['p50_ms']:10.2f} ms (exact {row['exact_p50_ms']:.2f} ms)")
+                results[f"top_k_ann_p{row['probes']}"] = row
+
+        matcher = SkillMatcher(job_index.skill_names, STOP_WORDS)
+        get_nlp()  # loaded once per process in the app too; keep it out of the first call's latency
+        run("extract", lambda text: nlp_extract_skills_from_text(text, matcher), resume_texts(queries, seed))
+
+        # ml_model.py's recommend_jobs path: TF-IDF over title + skills + industry, top-20 neighbours
+        # per job, then an O(n) lookup per recommendation
+        sub = jobs_df.iloc[:NEIGHBOUR_MAX_JOBS]
+        combined = sub["job_title"].astype(str) + " " + sub[skill_col].astype(str) + " " + sub["industry"].astype(str)
+        tfidf = TfidfVectorizer(stop_words="english").fit_transform(combined)
+        neighbours = run("neighbours", lambda m: build_neighbours(m, m=20), [tfidf], len(sub))
+        if neighbours is None:
+            neighbours = build_neighbours(tfidf, m=20) if "recommend" in stages else (None, None)
+        rng = np.random.default_rng(seed)
+        run("recommend", lambda i: similar_jobs(neighbours[0], neighbours[1], i, 5),
+            list(rng.integers(0, len(sub), size=n_queries)))
+    # tracemalloc only sees Python/NumPy allocations (not e.g. Arrow string buffers), so also keep
+    # the process high-water mark
+    results["process"] = {"max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return results
+
+
+# --------------------------
+# Reporting
+# --------------------------
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\np50 vs {baseline['commit']} (ratio > 1 is slower)")
+    for size, stages in current["sizes"].items():
+        for stage, stats in stages.items():
+            if "p50_ms" not in stats:
+                continue
+            old = baseline["sizes"].get(size, {}).get(stage)
+            if old and old["p50_ms"]:
+                ratio = stats["p50_ms"] / old["p50_ms"]
+                flag = "  <-- regression" if ratio > 1.2 else ""
+                print(f"  {size:>8} {stage:<16} {old['p50_ms']:10.2f} -> {stats['p50_ms']:10.2f} ms  x{ratio:.2f}{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ranking pipeline on synthetic catalogues.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--queries", type=int, default=50, help="queries (and resumes) per stage")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ann-probes", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="LSH probes per table compared by the top_k_ann stage")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", help=f"results file (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare p50 latencies against")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+        "sizes": {},
+    }
+    for n_jobs in args.sizes:
+        report["sizes"][str(n_jobs)] = run_size(n_jobs, set(args.stages), args.queries, args.k, args.batch_size,
+                                                args.seed, not args.no_memory, args.ann_probes)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
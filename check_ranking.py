@@ -0,0 +1,146 @@
+# check_ranking.py - Check the indexed ranking paths against the original per-row scoring
+#
+#   python check_ranking.py                                   # jobs_cleaned.csv, 200 random queries
+#   python check_ranking.py --csv jobs_cleaned_small.csv --queries 50 --k 5
+#
+# The reference is the app's original scoring: calculate_match() row by row for Match %, sklearn's
+# cosine_similarity of CountVectorizer(stop_words="english") vectors fitted on the CSV for the ML Score,
+# and Final Score = 0.6 * ML Score + 0.4 * Match % / 100. JobIndex.rank_jobs must give every job the
+# reference scores and matched skills; top_k and select_rows_batch must return k jobs whose reference
+# Final Scores are the k best (jobs tied on Final Score may come in either order), also under a facet
+# filter that repeats its value. Exits 1 on a mismatch.
+import argparse
+import sys
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from job_index import FACET_COLUMNS, calculate_match, detect_skill_column, normalize_column_name, parse_skills
+from job_store import read_jobs_csv
+from model_bundle import open_job_index
+
+TOLERANCE = 1e-9
+
+
+def reference_scores(skill_texts, vectorizer, job_vectors, user_skill_tokens):
+    """(matched skill sets, Match %, ML Score, Final Score) per job, computed as the original app did."""
+    matched, match_percent = zip(*(calculate_match(text, user_skill_tokens) for text in skill_texts))
+    match_percent = np.array(match_percent, dtype=float)
+    if user_skill_tokens:
+        user_vec = vectorizer.transform([", ".join(user_skill_tokens)])
+        ml_score = cosine_similarity(user_vec, job_vectors).flatten()
+    else:
+        ml_score = np.zeros(len(skill_texts))
+    return list(matched), match_percent, ml_score, 0.6 * ml_score + 0.4 * (match_percent / 100)
+
+def sample_queries(skill_names, n, seed):
+    # 1-4 known skills, sometimes plus a skill no job lists, and one empty query
+    rng = np.random.default_rng(seed)
+    queries = [[]]
+    for _ in range(n - 1):
+        tokens = list(rng.choice(skill_names, size=min(int(rng.integers(1, 5)), len(skill_names)), replace=False))
+        if rng.random() < 0.2:
+            tokens.append("no such skill")
+        queries.append([str(t) for t in tokens])
+    return queries
+
+
+def check_top(name, rows, final_score, k, allowed=None):
+    # The returned rows must be distinct allowed jobs carrying the best k reference scores, best first
+    allowed = np.ones(len(final_score), dtype=bool) if allowed is None else allowed
+    expected = -np.sort(-final_score[allowed])
+    problems = []
+    if len(rows) != min(k, len(expected)):
+        problems.append(f"{name}: {len(rows)} rows, expected {min(k, len(expected))}")
+    elif len(np.unique(rows)) != len(rows) or not allowed[rows].all():
+        problems.append(f"{name}: rows {np.asarray(rows).tolist()} repeat or fail the filters")
+    elif not np.allclose(final_score[rows], expected[:len(rows)], rtol=0, atol=TOLERANCE):
+        problems.append(f"{name}: scores {np.round(final_score[rows], 6).tolist()} "
+                        f"!= best {np.round(expected[:len(rows)], 6).tolist()}")
+    return problems
+
+def check_selection(job_index, tokens, k, final_score, filters=None, allowed=None):
+    # top_k and select_rows_batch for one query, optionally with facet filters (allowed = their row mask)
+    label = "" if filters is None else f" {filters}"
+    top = job_index.top_k(tokens, k, filters)
+    top_rows = job_index.jobs_df.index.get_indexer(top.index)
+    problems = check_top(f"top_k{label}", top_rows, final_score, k, allowed)
+    if np.abs(top["Final Score"].to_numpy(dtype=float) - final_score[top_rows]).max(initial=0) > TOLERANCE:
+        problems.append(f"top_k{label}: Final Score column differs from the reference")
+    batch_rows = job_index.select_rows_batch([(tokens, k, filters)])[0]
+    if isinstance(batch_rows, Exception):
+        problems.append(f"select_rows_batch{label}: {type(batch_rows).__name__}: {batch_rows}")
+    else:
+        problems += check_top(f"select_rows_batch{label}", batch_rows, final_score, k, allowed)
+    return problems
+
+def check_query(job_index, skill_texts, vectorizer, job_vectors, tokens, k, facet=None):
+    matched, match_percent, ml_score, final_score = reference_scores(skill_texts, vectorizer, job_vectors, tokens)
+    problems = []
+
+    ranked = job_index.rank_jobs(tokens)
+    rows = job_index.jobs_df.index.get_indexer(ranked.index)
+    for column, reference in (("Match %", match_percent), ("ML Score", ml_score), ("Final Score", final_score)):
+        error = np.abs(ranked[column].to_numpy(dtype=float) - reference[rows]).max(initial=0)
+        if error > TOLERANCE:
+            problems.append(f"rank_jobs: {column} differs by {error:.3g}")
+    if any(set(parse_skills(got)) != matched[row] for row, got in zip(rows, ranked["Matched Skills"])):
+        problems.append("rank_jobs: Matched Skills differ")
+    if np.any(np.diff(ranked["Final Score"].to_numpy(dtype=float)) > TOLERANCE):
+        problems.append("rank_jobs: not sorted by Final Score")
+
+    problems += check_selection(job_index, tokens, k, final_score)
+    if facet is not None:
+        # A value repeated in the filter must select its jobs once
+        name, column, value = facet
+        allowed = (column == value).to_numpy()
+        problems += check_selection(job_index, tokens, k, final_score, {name: [value, value]}, allowed)
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare rank_jobs, top_k and select_rows_batch with the "
+                                                 "per-row reference scoring.")
+    parser.add_argument("--csv", default="jobs_cleaned.csv")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    jobs_df = read_jobs_csv(args.csv)
+    skill_col = detect_skill_column(jobs_df)
+    job_index = open_job_index(jobs_df, skill_col, args.csv)
+    # Exact mode: the approximate path (ann_index.py) is allowed to miss jobs
+    job_index.ann_probes = 0
+    if job_index.retired is not None:
+        sys.exit(f"{args.csv} has retired jobs, which the reference scoring does not know about")
+
+    skill_texts = jobs_df[skill_col].astype(str).fillna("").tolist()
+    vectorizer = CountVectorizer(stop_words="english")
+    job_vectors = vectorizer.fit_transform(skill_texts)
+
+    # Facet filter checks use the first facet column, cycling through its values
+    columns = {normalize_column_name(c): c for c in jobs_df.columns}
+    facet = next((f for f in FACET_COLUMNS if f in columns), None)
+    facet_values = []
+    if facet is not None:
+        facet_column = jobs_df[columns[facet]].astype(str)
+        facet_values = sorted(facet_column.unique())
+
+    failed = 0
+    queries = sample_queries(job_index.skill_names, args.queries, args.seed)
+    for q, tokens in enumerate(queries):
+        query_facet = (facet, facet_column, facet_values[q % len(facet_values)]) if facet_values else None
+        problems = check_query(job_index, skill_texts, vectorizer, job_vectors, tokens, args.k, query_facet)
+        if problems:
+            failed += 1
+            print(f"✗ {tokens}")
+            for problem in problems:
+                print(f"    {problem}")
+    print(f"{len(queries) - failed}/{len(queries)} queries match the reference on {args.csv} ({len(jobs_df)} jobs)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
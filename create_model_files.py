@@ -1,40 +1,61 @@
-import pickle
+import argparse
+import os
+import time
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-
-# ----------------------------
-# Load dataset
-# ----------------------------
-jobs = pd.read_csv("jobs.csv")  # or jobs_cleaned.csv
-print("✅ Columns found:", jobs.columns.tolist())
-
-# Detect the skills column
-col_name = None
-for name in jobs.columns:
-    if 'skill' in name.lower():
-        col_name = name
-        break
-
-if not col_name:
-    raise ValueError("No column containing 'skill' found!")
-
-# Use only a smaller sample for demo (optional)
-if len(jobs) > 1000:
-    jobs = jobs.sample(500, random_state=42)  # <-- You can adjust 500 to 1000 safely
-    print(f"⚙️ Using random sample of 500 rows out of {len(jobs)} total")
-
-jobs[col_name] = jobs[col_name].fillna("")
-
-# ----------------------------
-# Vectorizer (no similarity computation here)
-# ----------------------------
-vectorizer = CountVectorizer(stop_words='english')
-job_vectors = vectorizer.fit_transform(jobs[col_name])
-
-# Save vectorizer and dataset for Flask
-pickle.dump(vectorizer, open("vectorizer.pkl", "wb"))
-jobs.to_csv("jobs_cleaned_small.csv", index=False)
-
-print("✅ vectorizer.pkl and reduced dataset saved successfully!")
-print(f"Vectorizer shape: {job_vectors.shape}")
-
+from data_clean_preprocessing import clean_chunks, clean_csv
+from job_index import detect_skill_column, load_jobs_df
+from job_store import STORE_DIR, build_job_store
+from model_bundle import BUNDLE_DIR, build_bundle
+from parallel_build import WORKERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the model bundle and job store for the app.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="build processes (default: every core)")
+    parser.add_argument("--sample", type=int, default=0,
+                        help="write a random N-row demo catalogue (jobs_cleaned_small.csv) from jobs.csv")
+    parser.add_argument("--clean", action="store_true",
+                        help="re-clean jobs.csv into jobs_cleaned.csv even if the cleaned file looks current")
+    args = parser.parse_args()
+
+    # ----------------------------
+    # Load dataset
+    # ----------------------------
+    # Raw dump (optional): clean it into the full catalogue whenever it is newer than the cleaned
+    # file (a fresh nightly dump), or with --sample clean a demo-sized random sample of it
+    if os.path.exists("jobs.csv") and args.sample:
+        jobs = pd.read_csv("jobs.csv", dtype=str)
+        if len(jobs) > args.sample:
+            print(f"⚙️ Using random sample of {args.sample} rows out of {len(jobs)} total")
+            jobs = jobs.sample(args.sample, random_state=42)
+        stats = {}
+        sample = pd.concat(list(clean_chunks([jobs], stats)))
+        sample.to_csv("jobs_cleaned_small.csv", index=False)
+        print(f"✅ Cleaned sample saved to jobs_cleaned_small.csv ({stats['rows_out']} rows)")
+    elif os.path.exists("jobs.csv") and (args.clean or not os.path.exists("jobs_cleaned.csv")
+                                         or os.path.getmtime("jobs.csv") > os.path.getmtime("jobs_cleaned.csv")):
+        stats = clean_csv("jobs.csv", "jobs_cleaned.csv")
+        print(f"✅ Cleaned dataset saved to jobs_cleaned.csv ({stats.get('rows_out', 0)} rows, "
+              f"{stats.get('duplicates', 0)} duplicates dropped)")
+
+    # ----------------------------
+    # Model bundle for the app (vocabulary, job matrix, row ids, CSV hash)
+    # ----------------------------
+    # Built from the same file the app loads, so the app can use it without refitting
+    start = time.perf_counter()
+    app_jobs, app_path = load_jobs_df()
+    manifest = build_bundle(app_jobs, detect_skill_column(app_jobs), app_path, workers=args.workers)
+
+    print(f"✅ Model bundle v{manifest['bundle_version']} saved to {BUNDLE_DIR}/ for {app_path} "
+          f"({args.workers} workers, {time.perf_counter() - start:.1f}s)")
+    print(f"Vectorizer shape: ({manifest['n_jobs']}, {manifest['n_terms']})")
+
+    # ----------------------------
+    # Typed column store, loaded by load_jobs_df() instead of parsing the CSV
+    # ----------------------------
+    store = build_job_store(app_jobs, app_path)
+    print(f"✅ Job store saved to {STORE_DIR}/ ({len(store['columns'])} columns, {store['n_rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,89 @@
-
-#Data Collection
-
+#Data Collection, Cleaning & Preprocessing
+# The raw dump is streamed in chunks, so peak memory depends on CHUNK_SIZE rather than on the file size.
+# De-duplication across chunks keeps one 8-byte hash per distinct row, in a sorted NumPy uint64 array
+# (8 MB per million distinct rows), so that is the only state that grows with the file.
+
+import os
+import sys
+import numpy as np
 import pandas as pd
-import re
-
-#Load dataset (downloaded CSV from Kaggle or other source)
-df = pd.read_csv("jobs.csv")
-
-#Inspect first few rows
-print("Sample Data:")
-print(df.head())
-
-#Basic dataset info
-print("\nDataset Info:")
-print(df.info())
-
-
 
-#Data Cleaning
+CHUNK_SIZE = 100_000
 
-# Check for missing values
-print("\nMissing values per column (Before Handling):")
-print(df.isnull().sum())
-
-# Handle missing values
-missing_before = df.isnull().sum().sum()
-if missing_before == 0:
-    print("No missing values found")
-else:
-    df.fillna("", inplace=True)
-    print("\nMissing values after filling:")
-    print(df.isnull().sum())
-
-#Check duplicates
-print("\nDataset shape before removing duplicates:", df.shape)
-
-duplicates_count = df.duplicated().sum()
-if duplicates_count == 0:
-    print("No duplicate rows found")
-else:
-    print(f"Found {duplicates_count} duplicate rows. Removing duplicates...")
-    df.drop_duplicates(inplace=True)
-    print("Dataset shape after removing duplicates:", df.shape)
 
 #Standardize column names
-print("\nColumn names before standardization:")
-print(df.columns)
-
-# Standardize
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-print("\nColumn names after standardization:")
-print(df.columns)
-
-
-print("\nSample of cleaned dataset (top 5 rows):")
-print(df.head())
-
-
-
-#Data Preprocessing
-
-print(df.columns)
+def standardize_columns(columns):
+    return columns.str.strip().str.lower().str.replace(' ', '_')
 
 #Clean 'skills' column (lowercase, remove punctuation, extra spaces)
-def clean_skills(text):
-    text = text.lower()                           # lowercase
-    text = re.sub(r'[^\w\s,]', '', text)          # remove punctuation except commas
-    text = re.sub(r'\s+', ' ', text)              # remove extra spaces
-    return text.strip()
-
-df['required_skills'] = df['required_skills'].apply(clean_skills)
-
-print(df['required_skills'].head(10))
-
-
-#Save cleaned & preprocessed dataset
-df.to_csv("jobs_cleaned.csv", index=False)
-
-print("\nDataset cleaned and saved as jobs_cleaned.csv")
-
-
-
+def clean_skills(skills):
+    return (skills.astype(str)
+            .str.lower()                                  # lowercase
+            .str.replace(r'[^\w\s,]', '', regex=True)     # remove punctuation except commas
+            .str.replace(r'\s+', ' ', regex=True)         # remove extra spaces
+            .str.strip())
+
+def clean_chunks(chunks, stats):
+    """Clean a stream of raw DataFrame chunks, yielding cleaned chunks.
+
+    Rows are de-duplicated against every earlier row through a sorted uint64 array of 64-bit row hashes.
+    Counters are accumulated into the `stats` dict.
+    """
+    seen = np.zeros(0, dtype=np.uint64)
+    columns = None
+    for chunk in chunks:
+        stats["rows_in"] = stats.get("rows_in", 0) + len(chunk)
+        stats["missing"] = stats.get("missing", 0) + int(chunk.isnull().sum().sum())
+
+        # Handle missing values
+        chunk = chunk.fillna("")
+
+        # Keep the first copy of each row within the chunk, unless an earlier chunk already had it
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy(dtype=np.uint64)
+        new, first = np.unique(hashes, return_index=True)
+        pos = np.searchsorted(seen, new)
+        fresh = np.ones(len(new), dtype=bool)
+        if len(seen):
+            fresh = seen[np.minimum(pos, len(seen) - 1)] != new
+        keep = np.zeros(len(chunk), dtype=bool)
+        keep[first[fresh]] = True
+        chunk = chunk[keep]
+        seen = np.insert(seen, pos[fresh], new[fresh])
+        stats["duplicates"] = stats.get("duplicates", 0) + len(keep) - len(chunk)
+
+        # Column names are standardized once, from the first chunk's header
+        if columns is None:
+            columns = standardize_columns(chunk.columns)
+        chunk.columns = columns
+        chunk['required_skills'] = clean_skills(chunk['required_skills'])
+
+        stats["rows_out"] = stats.get("rows_out", 0) + len(chunk)
+        yield chunk
+
+def clean_csv(src, dst, chunk_size=CHUNK_SIZE):
+    stats = {}
+    tmp = dst + ".tmp"
+    first = True
+    # dtype=str keeps every chunk's dtypes (and so its row hashes) consistent
+    for chunk in clean_chunks(pd.read_csv(src, chunksize=chunk_size, dtype=str), stats):
+        chunk.to_csv(tmp, mode="w" if first else "a", header=first, index=False)
+        if first:
+            print("\nColumn names after standardization:")
+            print(list(chunk.columns))
+            print("\nSample of cleaned skills:")
+            print(chunk['required_skills'].head(10))
+        first = False
+    os.replace(tmp, dst)
+    return stats
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "jobs.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "jobs_cleaned.csv"
+    stats = clean_csv(src, dst)
+
+    print(f"\nRows read: {stats.get('rows_in', 0)}")
+    print(f"Missing values filled: {stats.get('missing', 0)}")
+    print(f"Duplicate rows removed: {stats.get('duplicates', 0)}")
+    print(f"Rows written: {stats.get('rows_out', 0)}")
+    print(f"\nDataset cleaned and saved as {dst}")
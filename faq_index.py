@@ -0,0 +1,61 @@
+# faq_index.py - Offline retrieval index over FAQ questions for the career chatbot page
+import json
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Below this the best answer is treated as "not known"
+MIN_CONFIDENCE = 0.25
+
+
+def load_faq_corpus(path):
+    """{category: {question: answer}} from a JSON file in the same shape as faq_data."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def merge_faq(*corpora):
+    merged = {}
+    for corpus in corpora:
+        for category, qa in corpus.items():
+            merged.setdefault(category, {}).update(qa)
+    return merged
+
+
+class FaqIndex:
+    """Word (1-2 gram) and character (3-5 gram) TF-IDF matrices over "category question", built once.
+
+    A question is scored against the whole corpus with one sparse product per representation, so the
+    work follows the postings of the question's n-grams instead of a Python loop over every entry.
+    The character n-grams catch typos and word forms ("interviews" / "interview"); the confidence is
+    the mean of the two cosine similarities, in [0, 1].
+    """
+
+    def __init__(self, faq_data):
+        self.entries = [(category, question, answer) for category, qa in faq_data.items()
+                        for question, answer in qa.items()]
+        texts = [f"{category} {question}" for category, question, _ in self.entries]
+        self.word = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True)
+        self.char = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), sublinear_tf=True)
+        # Stored term x question, ready for query @ matrix
+        self.word_matrix = self.word.fit_transform(texts).T.tocsr()
+        self.char_matrix = self.char.fit_transform(texts).T.tocsr()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def scores(self, questions):
+        """len(questions) x len(self) confidence matrix."""
+        word = self.word.transform(questions) @ self.word_matrix
+        char = self.char.transform(questions) @ self.char_matrix
+        return ((word + char) * 0.5).toarray()
+
+    def search(self, question, n=3):
+        """Best n (category, question, answer, confidence) entries, most confident first."""
+        scores = self.scores([question])[0]
+        best = np.argsort(-scores, kind="stable")[:n]
+        return [(*self.entries[i], float(scores[i])) for i in best]
+
+    def best(self, question, min_confidence=MIN_CONFIDENCE):
+        """The most confident entry, or None when nothing reaches min_confidence."""
+        hits = self.search(question, 1)
+        return hits[0] if hits and hits[0][3] >= min_confidence else None
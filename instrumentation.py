@@ -0,0 +1,170 @@
+# instrumentation.py - Opt-in per-stage timing, allocation and row-count tracing
+#
+#   JOBREC_PROFILE=1 streamlit run textbox_resume_match.py     # trace every request
+#   JOBREC_PROFILE=1 JOBREC_PROFILE_MEMORY=1 ...               # ... and their allocations (tracemalloc)
+#
+# Code marks its stages with `with stage("name", rows=n):`. Outside a traced request stage() returns a
+# shared no-op context manager, so disabled instrumentation costs one ContextVar lookup per stage.
+# Finished requests are logged as one JSON line on the "jobrec.stages" logger and aggregated into
+# STAGE_METRICS (Prometheus text via STAGE_METRICS.render()).
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger("jobrec.stages")
+
+ENABLED = os.environ.get("JOBREC_PROFILE", "") not in ("", "0")
+TRACE_MEMORY = os.environ.get("JOBREC_PROFILE_MEMORY", "") not in ("", "0")
+
+_current_trace = contextvars.ContextVar("jobrec_trace", default=None)
+
+
+class _NoopStage:
+    # Returned by stage() when nothing is being traced; setting .rows on it is ignored
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NOOP_STAGE = _NoopStage()
+
+
+class Stage:
+    def __init__(self, trace, name, rows):
+        self.trace, self.name, self.rows = trace, name, rows
+        self.depth = 0
+        self.seconds = 0.0
+        self.alloc_bytes = None  # peak bytes allocated above the level at stage entry
+        self._peak = 0
+
+    def __enter__(self):
+        self.depth = len(self.trace.stack)
+        self.trace.stack.append(self)
+        self.trace.stages.append(self)
+        if self.trace.memory:
+            # reset_peak() also resets it for enclosing stages, so children hand their peak back up
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        self.trace.stack.pop()
+        if self.trace.memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self._peak)
+            self.alloc_bytes = max(peak - self._base, 0)
+            if self.trace.stack:
+                parent = self.trace.stack[-1]
+                parent._peak = max(parent._peak, peak)
+        return False
+
+    def to_dict(self):
+        return {"stage": self.name, "depth": self.depth, "ms": round(self.seconds * 1000, 3),
+                "alloc_kb": None if self.alloc_bytes is None else round(self.alloc_bytes / 1024, 1),
+                "rows": self.rows}
+
+
+class Trace:
+    """Stages recorded for one request; begin() makes it current for the calling thread/task."""
+
+    def __init__(self, name, memory=TRACE_MEMORY):
+        self.name = name
+        self.memory = memory
+        self.stages, self.stack = [], []
+        self.seconds = 0.0
+
+    def begin(self):
+        self._started_tracemalloc = self.memory and not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self._token = _current_trace.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        _current_trace.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        STAGE_METRICS.record(self)
+        logger.info(json.dumps(self.to_dict()))
+        return self
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+    def to_dict(self):
+        return {"request": self.name, "ms": round(self.seconds * 1000, 3),
+                "stages": [s.to_dict() for s in self.stages]}
+
+
+def stage(name, rows=None):
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_STAGE
+    return Stage(trace, name, rows)
+
+def request(name, enabled=None):
+    """Trace for one request, or None when profiling is off (enabled defaults to JOBREC_PROFILE)."""
+    if not (ENABLED if enabled is None else enabled):
+        return None
+    return Trace(name)
+
+
+class StageMetrics:
+    """Process-wide totals per (request, stage), rendered in the Prometheus text format."""
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, trace):
+        with self._lock:
+            for s in [trace] + trace.stages:
+                name = "total" if s is trace else s.name
+                entry = self.stages.setdefault((trace.name, name), {
+                    "count": 0, "seconds": 0.0, "rows": 0, "alloc_max": 0, "buckets": [0] * len(self.BUCKETS_MS)})
+                entry["count"] += 1
+                entry["seconds"] += s.seconds
+                ms = s.seconds * 1000
+                for i, bound in enumerate(self.BUCKETS_MS):
+                    entry["buckets"][i] += ms <= bound
+                if getattr(s, "rows", None):
+                    entry["rows"] += s.rows
+                if getattr(s, "alloc_bytes", None):
+                    entry["alloc_max"] = max(entry["alloc_max"], s.alloc_bytes)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self.stages.items())
+        lines = ["# TYPE jobrec_stage_duration_ms histogram"]
+        for (req, name), e in items:
+            labels = f'request="{req}",stage="{name}"'
+            lines += [f'jobrec_stage_duration_ms_bucket{{{labels},le="{b}"}} {n}'
+                      for b, n in zip(self.BUCKETS_MS, e["buckets"])]
+            lines += [f'jobrec_stage_duration_ms_bucket{{{labels},le="+Inf"}} {e["count"]}',
+                      f"jobrec_stage_duration_ms_sum{{{labels}}} {e['seconds'] * 1000:.3f}",
+                      f"jobrec_stage_duration_ms_count{{{labels}}} {e['count']}"]
+        lines.append("# TYPE jobrec_stage_rows_total counter")
+        lines += [f'jobrec_stage_rows_total{{request="{req}",stage="{name}"}} {e["rows"]}' for (req, name), e in items]
+        lines.append("# TYPE jobrec_stage_alloc_max_bytes gauge")
+        lines += [f'jobrec_stage_alloc_max_bytes{{request="{req}",stage="{name}"}} {e["alloc_max"]}'
+                  for (req, name), e in items]
+        return "\n".join(lines) + "\n"
+
+STAGE_METRICS = StageMetrics()
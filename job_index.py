@@ -0,0 +1,599 @@
+# job_index.py - Precomputed job x skill index used to rank jobs for a user
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ann_index import ANN_MIN_CANDIDATES, ANN_PROBES, LshIndex
+from instrumentation import stage
+from job_store import load_job_store, read_jobs_csv
+
+
+JOB_FILES = ["jobs_cleaned.csv", "jobs_cleaned_small.csv", "jobs.csv"]
+
+
+# --------------------------
+# Loading
+# --------------------------
+def detect_skill_column(df):
+    for col in df.columns:
+        if "skill" in col.lower() or "required" in col.lower():
+            return col
+    for col in ["required_skills","skills","skills_required","skillset"]:
+        if col in df.columns: return col
+    return None
+
+def ranking_columns(facets=True):
+    """Column filter for load_jobs_df: the skills column, the fields result_records shows and, with
+    facets, the filter columns. Other columns (descriptions...) are never decoded."""
+    wanted = set(RESULT_COLUMNS) | ({*FACET_COLUMNS, SALARY_COLUMN} if facets else set())
+    return lambda col: (normalize_column_name(col) in wanted or "skill" in col.lower()
+                        or "required" in col.lower())
+
+def load_jobs_df(columns=None):
+    """Returns (jobs_df, path) for the first readable job file, or an empty frame and None.
+
+    Reads the typed column store (job_store.py) when it was built from that file, else the CSV;
+    `columns` (a list of names, or a predicate on them such as ranking_columns()) limits what is read.
+    """
+    for name in JOB_FILES:
+        if os.path.exists(name):
+            jobs_df = load_job_store(name, columns)
+            if jobs_df is not None:
+                return jobs_df, name
+            try: return read_jobs_csv(name, columns), name
+            except: continue
+    return pd.DataFrame(columns=["job_title","company","location","required_skills","description"]), None
+
+
+# --------------------------
+# Skill parsing
+# --------------------------
+def parse_skills(skill_text):
+    return [s.strip().lower() for s in str(skill_text).split(",") if s.strip()]
+
+def calculate_match(job_skill_text, user_skill_tokens):
+    # Reference (per-row) implementation; JobIndex.match must agree with it.
+    job_tokens = parse_skills(job_skill_text)
+    matched = set(user_skill_tokens).intersection(set(job_tokens))
+    match_percent = round((len(matched)/len(user_skill_tokens)*100) if user_skill_tokens else 0, 2)
+    return matched, match_percent
+
+def intern_skills(skill_texts):
+    """Parse every job's comma separated skills once into interned integer ids.
+
+    Returns (skill_names, offsets, ids): a ragged array where ids[offsets[j]:offsets[j + 1]] are job j's
+    skill ids (int32, in listed order, repeats kept) and skill_names[i] is the name of id i. Ids are
+    numbered in order of first appearance. A categorical column (see job_store.py) is parsed once per
+    distinct skill list rather than once per job.
+    """
+    if isinstance(getattr(skill_texts, "dtype", None), pd.CategoricalDtype):
+        codes = skill_texts.cat.codes.to_numpy(dtype=np.int64)
+        names, uniq_offsets, uniq_ids = intern_skills(skill_texts.cat.categories.astype(str))
+        lengths = np.diff(uniq_offsets)[codes]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        # Gather each row's slice of its category's ids without a Python loop
+        starts = np.repeat(uniq_offsets[codes] - offsets[:-1], lengths)
+        ids = uniq_ids[starts + np.arange(offsets[-1])]
+        order, used = pd.factorize(ids)
+        return names[used], offsets, order.astype(np.int32)
+
+    parts = pd.Series(list(skill_texts), dtype=object).astype(str).str.split(",")
+    n_jobs = len(parts)
+    lengths = parts.str.len().to_numpy(dtype=np.int64) if n_jobs else np.zeros(0, dtype=np.int64)
+    rows = np.repeat(np.arange(n_jobs), lengths)
+    tokens = parts.explode().astype(str).str.strip().str.lower().to_numpy(dtype=object) if n_jobs else np.zeros(0, dtype=object)
+    keep = tokens != ""
+    ids, skill_names = pd.factorize(tokens[keep])
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=n_jobs))]).astype(np.int64)
+    return np.asarray(skill_names, dtype=object), offsets, ids.astype(np.int32)
+
+def build_skill_matrix(skill_texts, binary=True, intern=intern_skills):
+    """Job x skill CSR matrix over the interned skill ids (see intern_skills).
+
+    Returns (skill_names, matrix) where column j of matrix is skill_names[j]. With binary=False
+    entries count how often a job lists the skill.
+    """
+    skill_names, offsets, ids = intern(skill_texts)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(ids), dtype=np.int32), ids, offsets),
+        shape=(len(offsets) - 1, len(skill_names)),
+    )
+    # A skill listed twice for the same job still counts once (unless counts are asked for)
+    matrix.sum_duplicates()
+    if binary:
+        matrix.data[:] = 1
+    return skill_names, matrix
+
+
+def select_top_k(scores, k):
+    """Positions of the k highest scores, best first, ties broken by position. O(n) + O(k log k)."""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= n:
+        return np.lexsort((np.arange(n), -scores))
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    best = np.concatenate([above, ties])
+    return best[np.lexsort((best, -scores[best]))]
+
+
+def row_norms(matrix):
+    squares = sparse.csr_matrix(matrix).multiply(matrix).sum(axis=1)
+    return np.sqrt(np.asarray(squares, dtype=np.float64).ravel())
+
+def postings_matrix(job_matrix):
+    # Transposed copy of a job x feature matrix: row f lists the jobs that have feature f
+    postings = sparse.csr_matrix(job_matrix).T.tocsr()
+    postings.sort_indices()
+    return postings
+
+def posting_list(postings, feature):
+    return postings.indices[postings.indptr[feature]:postings.indptr[feature + 1]]
+
+
+# --------------------------
+# Facet index
+# --------------------------
+FACET_COLUMNS = ["location", "experience_level", "industry"]
+SALARY_COLUMN = "salary"
+# Job fields shown with each result (see result_records)
+RESULT_COLUMNS = ["job_title", "company", "location"]
+
+def normalize_column_name(col):
+    return str(col).strip().lower().replace(" ", "_")
+
+class FacetIndex:
+    """Inverted row lists per value of the categorical facets plus a sorted salary array.
+
+    Filters look like {"location": ["Berlin", "Sydney"], "experience_level": "Senior Level",
+    "salary_min": 80000, "salary_max": 120000}. Facet names are matched to the jobs_df columns
+    case/space-insensitively ("Experience Level" -> "experience_level").
+    """
+
+    def __init__(self, jobs_df, salary=None):
+        self.n_rows = len(jobs_df)
+        columns = {normalize_column_name(c): c for c in jobs_df.columns}
+        self.codes, self.values, self.postings = {}, {}, {}
+        for facet in FACET_COLUMNS:
+            if facet not in columns:
+                continue
+            column = jobs_df[columns[facet]]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Column store categoricals already are codes + distinct values
+                codes, values = column.cat.codes.to_numpy(), column.cat.categories.astype(str)
+            else:
+                codes, values = pd.factorize(column.astype(str))
+            order = np.argsort(codes, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(values)))])
+            self.codes[facet] = codes.astype(np.int32)
+            self.values[facet] = {v: i for i, v in enumerate(values)}
+            self.postings[facet] = [order[bounds[i]:bounds[i + 1]] for i in range(len(values))]
+
+        if salary is None and SALARY_COLUMN in columns:
+            salary = pd.to_numeric(jobs_df[columns[SALARY_COLUMN]], errors="coerce").to_numpy(dtype=np.float64)
+        self.salary = salary
+        if salary is not None:
+            # NaN sorts last, so missing salaries never fall inside a [min, max] range
+            self.salary_order = np.argsort(salary, kind="stable")
+            self.salary_sorted = np.asarray(salary)[self.salary_order]
+
+    def facet_values(self, facet):
+        return sorted(self.values.get(facet, {}))
+
+    def rows(self, filters):
+        """Sorted row positions matching every filter.
+
+        Starts from the most selective filter's rows and checks the others on those rows only,
+        so the cost follows the size of the smallest matching set rather than the catalogue.
+        """
+        facet_codes = {}
+        for facet, wanted in filters.items():
+            if facet in ("salary_min", "salary_max"):
+                continue
+            if facet not in self.codes:
+                raise KeyError(f"Unknown facet: {facet}")
+            if isinstance(wanted, (str, int, float)):
+                wanted = [wanted]
+            # Distinct codes: a value repeated in the filter must not repeat its rows
+            facet_codes[facet] = np.unique(np.array([self.values[facet][str(v)] for v in wanted
+                                                     if str(v) in self.values[facet]], dtype=np.int32))
+        sizes = {facet: sum(len(self.postings[facet][c]) for c in codes) for facet, codes in facet_codes.items()}
+
+        lo, hi = filters.get("salary_min"), filters.get("salary_max")
+        use_salary = self.salary is not None and (lo is not None or hi is not None)
+        lo = -np.inf if lo is None else lo
+        hi = np.inf if hi is None else hi
+        if use_salary:
+            start = np.searchsorted(self.salary_sorted, lo, side="left")
+            stop = np.searchsorted(self.salary_sorted, hi, side="right")
+            sizes[SALARY_COLUMN] = max(stop - start, 0)
+
+        if not sizes:
+            return np.arange(self.n_rows)
+        first = min(sizes, key=sizes.get)
+        if first == SALARY_COLUMN:
+            rows = np.sort(self.salary_order[start:stop])
+        else:
+            postings = [self.postings[first][c] for c in facet_codes[first]]
+            rows = np.sort(np.concatenate(postings)) if postings else np.zeros(0, dtype=np.int64)
+        for facet, codes in facet_codes.items():
+            if facet != first:
+                rows = rows[np.isin(self.codes[facet][rows], codes)]
+        if use_salary and first != SALARY_COLUMN:
+            salary = np.asarray(self.salary)[rows]
+            rows = rows[(salary >= lo) & (salary <= hi)]
+        return rows
+
+
+# --------------------------
+# Job index
+# --------------------------
+class JobIndex:
+    def __init__(self, jobs_df, skill_col, vectorizer=None, job_vectors=None, skill_names=None, skill_matrix=None,
+                 retired=None, version=None, numeric_columns=None, skill_postings=None, term_postings=None,
+                 job_norms=None):
+        self.jobs_df = jobs_df
+        self.skill_col = skill_col
+        self.vectorizer = vectorizer
+        self.job_vectors = job_vectors
+        if skill_matrix is None:
+            skill_texts = jobs_df[skill_col] if skill_col else [""] * len(jobs_df)
+            skill_names, skill_matrix = build_skill_matrix(skill_texts)
+        self.skill_names, self.skill_matrix = skill_names, skill_matrix
+        self.skill_ids = {s: i for i, s in enumerate(self.skill_names)}
+        # Tombstoned rows (see model_bundle.retire_jobs) are never ranked
+        self.retired = np.asarray(retired, dtype=bool) if retired is not None and np.any(retired) else None
+        # Identifies the catalogue contents, e.g. for keying cached query results
+        self.version = version
+        salary = next((v for c, v in (numeric_columns or {}).items() if normalize_column_name(c) == SALARY_COLUMN), None)
+        self.facets = FacetIndex(jobs_df, salary)
+        # Inverted lists: row s of skill_postings (term_postings) holds the jobs requiring skill s (term t).
+        # Built on first use unless they come precomputed with the model bundle.
+        self._skill_postings, self._term_postings = skill_postings, term_postings
+        self._job_norms = job_norms
+        self._scratch = threading.local()
+        # Approximate retrieval (see ann_index.py): buckets probed per LSH table, 0 = exact
+        self.ann_probes = ANN_PROBES
+        self._lsh = None
+        self._lsh_lock = threading.Lock()
+
+    def __len__(self):
+        return self.skill_matrix.shape[0]
+
+    def user_skill_ids(self, user_skill_tokens):
+        # Distinct skills known to the catalogue, in the order the user gave them
+        return np.array([self.skill_ids[s] for s in dict.fromkeys(user_skill_tokens) if s in self.skill_ids],
+                        dtype=np.int64)
+
+    def overlap_counts(self, ids, rows=None):
+        user_vec = np.zeros(self.skill_matrix.shape[1], dtype=np.int32)
+        user_vec[ids] = 1
+        matrix = self.skill_matrix if rows is None else self.skill_matrix[rows]
+        return matrix @ user_vec
+
+    def match_percent(self, overlap, user_skill_tokens, n_ids):
+        # Percent depends only on the overlap count, so round once per possible count
+        n_tokens = len(user_skill_tokens)
+        percent_table = np.array([round((k/n_tokens*100) if n_tokens else 0, 2) for k in range(n_ids + 1)],
+                                 dtype=float)
+        return percent_table[overlap]
+
+    def matched_skills(self, rows, ids, overlap):
+        # Comma joined matched skill names for the given job rows (overlap is aligned with rows)
+        matched = [""] * len(rows)
+        hits = np.flatnonzero(overlap)
+        if len(hits):
+            names = self.skill_names[ids]
+            sub = self.skill_matrix[np.asarray(rows)[hits]][:, ids].tocsr()
+            sub.sort_indices()
+            for r, pos in enumerate(hits):
+                matched[pos] = ", ".join(names[sub.indices[sub.indptr[r]:sub.indptr[r + 1]]])
+        return matched
+
+    def match(self, user_skill_tokens):
+        """Vectorised calculate_match over every job.
+
+        Returns (matched_skills, match_percent): a list of ", " joined matched skill strings
+        and a float array of match percentages, one entry per job.
+        """
+        ids = self.user_skill_ids(user_skill_tokens)
+        overlap = self.overlap_counts(ids)
+        match_percent = self.match_percent(overlap, user_skill_tokens, len(ids))
+        return self.matched_skills(np.arange(len(self)), ids, overlap), match_percent
+
+    def user_terms(self, user_skill_tokens):
+        # (term ids, counts) of the user's skills under the vectorizer, or None without an ML model
+        if self.job_vectors is None or self.vectorizer is None or len(user_skill_tokens) == 0:
+            return None
+        with stage("vectorizer_transform"):
+            user_vec = self.vectorizer.transform([", ".join(user_skill_tokens)])
+        return user_vec.indices, user_vec.data
+
+    def scratch(self):
+        # Full-length per-thread accumulators, all zero between calls (see accumulated)
+        buffers = self._scratch
+        if getattr(buffers, "dots", None) is None:
+            buffers.dots = np.zeros(len(self))
+            buffers.overlap = np.zeros(len(self), dtype=np.int32)
+        return buffers
+
+    @contextmanager
+    def accumulated(self, ids, terms):
+        """Scratch buffers holding every job's overlap count and dot product with the user.
+
+        Only the posting lists of the user's skills and terms are added in (and cleared again on
+        exit), so the cost follows those lists rather than the catalogue.
+        """
+        buffers = self.scratch()
+        skill_lists, term_lists = [posting_list(self.skill_postings, i) for i in ids], []
+        try:
+            for jobs in skill_lists:
+                buffers.overlap[jobs] += 1
+            if terms is not None:
+                postings = self.term_postings
+                for term, count in zip(*terms):
+                    lo, hi = postings.indptr[term], postings.indptr[term + 1]
+                    term_lists.append(postings.indices[lo:hi])
+                    buffers.dots[term_lists[-1]] += count * postings.data[lo:hi]
+            yield buffers
+        finally:
+            for jobs in skill_lists:
+                buffers.overlap[jobs] = 0
+            for jobs in term_lists:
+                buffers.dots[jobs] = 0
+
+    def posting_size(self, ids, terms):
+        # Total length of the user's posting lists: the work accumulated() does
+        size = np.diff(self.skill_postings.indptr)[ids].sum()
+        if terms is not None:
+            size += np.diff(self.term_postings.indptr)[terms[0]].sum()
+        return int(size)
+
+    def blend(self, user_skill_tokens, ids, terms, overlap, dots, norms):
+        """(match_percent, ml_score, final_score) from overlap counts, dot products and job norms.
+
+        Cosine is dot / (|job| |user|); the final score is written in place into the Match % / 100 array.
+        """
+        match_percent = self.match_percent(overlap, user_skill_tokens, len(ids))
+        final_score = match_percent / 100
+        ml_score = np.zeros(len(overlap))
+        if terms is not None:
+            np.multiply(norms, np.sqrt(np.dot(terms[1], terms[1])), out=ml_score)
+            np.divide(dots, ml_score, out=ml_score, where=ml_score > 0)
+            final_score *= 0.4
+            final_score += 0.6*ml_score
+        return match_percent, ml_score, final_score
+
+    def scores(self, user_skill_tokens, rows=None):
+        """Score jobs (all of them, or only `rows`) for a user.
+
+        Returns (ids, overlap, match_percent, ml_score, final_score) as NumPy arrays aligned with rows.
+        Overlaps and dot products come from the accumulated posting lists, or, when `rows` hold fewer
+        entries than those lists, from just their rows of the matrices. Job norms are precomputed
+        (see job_norms), so nothing is normalised per request.
+        """
+        ids = self.user_skill_ids(user_skill_tokens)
+        terms = self.user_terms(user_skill_tokens)
+        with stage("score_kernel", rows=len(self) if rows is None else len(rows)):
+            norms = None if terms is None else self.job_norms() if rows is None else self.job_norms()[rows]
+            row_nnz = (self.skill_matrix.nnz + (0 if terms is None else self.job_vectors.nnz)) / max(len(self), 1)
+            if rows is not None and len(rows) * row_nnz < self.posting_size(ids, terms):
+                overlap, dots = self.overlap_counts(ids, rows), None
+                if terms is not None:
+                    user_vec = np.zeros(self.job_vectors.shape[1])
+                    user_vec[terms[0]] = terms[1]
+                    dots = self.job_vectors[rows] @ user_vec
+                return (ids, overlap, *self.blend(user_skill_tokens, ids, terms, overlap, dots, norms))
+            with self.accumulated(ids, terms) as buffers:
+                overlap = buffers.overlap.copy() if rows is None else buffers.overlap[rows]
+                dots = buffers.dots if rows is None else buffers.dots[rows]
+                return (ids, overlap, *self.blend(user_skill_tokens, ids, terms, overlap, dots, norms))
+
+    def candidate_rows(self, filters=None):
+        """Row positions that are live and match every facet filter (see FacetIndex).
+
+        Returns None when every row qualifies, so callers can score the full matrices without slicing.
+        """
+        filters = {f: v for f, v in (filters or {}).items() if v not in (None, [], ())}
+        if not filters and self.retired is None:
+            return None
+        rows = self.facets.rows(filters) if filters else np.arange(len(self))
+        if self.retired is not None:
+            rows = rows[~self.retired[rows]]
+        return rows
+
+    def rank_jobs(self, user_skill_tokens):
+        rows = self.candidate_rows()
+        df = self.jobs_df.copy() if rows is None else self.jobs_df.iloc[rows].copy()
+        ids, overlap, match_percent, ml_score, final_score = self.scores(user_skill_tokens, rows)
+        df["Matched Skills"] = self.matched_skills(np.arange(len(self)) if rows is None else rows, ids, overlap)
+        df["Match %"] = match_percent
+        df["ML Score"] = ml_score
+        df["Final Score"] = final_score
+        with stage("sort", rows=len(df)):
+            df = df.sort_values(by="Final Score", ascending=False)
+        return df
+
+    @property
+    def skill_postings(self):
+        if self._skill_postings is None:
+            self._skill_postings = postings_matrix(self.skill_matrix)
+        return self._skill_postings
+
+    @property
+    def term_postings(self):
+        if self._term_postings is None and self.job_vectors is not None:
+            self._term_postings = postings_matrix(self.job_vectors)
+        return self._term_postings
+
+    def lsh(self):
+        # Hash tables over the job term vectors, built once on the first approximate query; concurrent
+        # first queries (service executor threads, Streamlit sessions) wait for that one build
+        if self._lsh is None:
+            with self._lsh_lock:
+                if self._lsh is None:
+                    self._lsh = LshIndex(self.job_vectors)
+        return self._lsh
+
+    def ann_rows(self, terms, probes):
+        """Approximate candidate rows: the jobs in the user's LSH buckets (see ann_index.py)."""
+        user_vec = sparse.csr_matrix((terms[1], terms[0], [0, len(terms[0])]), shape=(1, self.job_vectors.shape[1]))
+        return self.lsh().candidates(user_vec, probes)
+
+    def select_rows(self, user_skill_tokens, k, filters=None, ann_probes=None):
+        """Row positions of the best k live jobs, best first, ties broken by row order.
+
+        Only jobs on the posting lists of the user's skills and vectorizer terms can score above 0;
+        they are found and scored in one accumulated() pass. With ann_probes (default: self.ann_probes)
+        > 0, queries with long posting lists only score the LSH shortlist, exactly; the result is then
+        approximate.
+        """
+        ids = self.user_skill_ids(user_skill_tokens)
+        return self.select_user_rows(user_skill_tokens, ids, self.user_terms(user_skill_tokens), k, filters,
+                                     ann_probes)
+
+    def select_user_rows(self, user_skill_tokens, ids, terms, k, filters=None, ann_probes=None):
+        # select_rows with the user's skill ids and (term ids, counts) already worked out
+        probes = self.ann_probes if ann_probes is None else ann_probes
+        allowed = self.candidate_rows(filters)
+        if probes and terms is not None and self.posting_size(ids, terms) > ANN_MIN_CANDIDATES:
+            with stage("ann_shortlist") as s:
+                matching = self.ann_rows(terms, probes)
+                if allowed is not None:
+                    matching = matching[np.isin(matching, allowed, assume_unique=True)]
+                s.rows = len(matching)
+            final_score = self.scores(user_skill_tokens, matching)[-1]
+            with stage("select_top_k", rows=len(matching)):
+                return self.pick_winners(matching, final_score, k, allowed)
+
+        with stage("score_kernel", rows=self.posting_size(ids, terms)), self.accumulated(ids, terms) as buffers:
+            with stage("candidates") as s:
+                touched = buffers.overlap > 0
+                if terms is not None:
+                    touched |= buffers.dots > 0
+                if allowed is not None:
+                    matching = allowed[touched[allowed]]
+                else:
+                    matching = np.flatnonzero(touched)
+                s.rows = len(matching)
+            norms = None if terms is None else self.job_norms()[matching]
+            final_score = self.blend(user_skill_tokens, ids, terms, buffers.overlap[matching],
+                                     buffers.dots[matching], norms)[-1]
+        with stage("select_top_k", rows=len(matching)):
+            return self.pick_winners(matching, final_score, k, allowed)
+
+    def pick_winners(self, matching, final_score, k, allowed=None):
+        """Best k of the scored matching rows, padded with zero-score rows in row order like a full ranking."""
+        best = select_top_k(final_score, k)
+        winners = matching[best][final_score[best] > 0]
+        if len(winners) < k:
+            n_allowed = len(self) if allowed is None else len(allowed)
+            first_rows = np.arange(min(k + len(winners), n_allowed)) if allowed is None else allowed[:k + len(winners)]
+            padding = first_rows[~np.isin(first_rows, winners)][:k - len(winners)]
+            winners = np.concatenate([winners, padding]).astype(np.int64)
+        return winners
+
+    def job_norms(self):
+        # L2 norm of every job's term vector; precomputed in the model bundle, else built once
+        if self._job_norms is None:
+            self._job_norms = row_norms(self.job_vectors)
+        return self._job_norms
+
+    def select_rows_batch(self, queries):
+        """select_rows for many (user_skill_tokens, k, filters) queries at once, always exact.
+
+        The queries share one vectorizer transform; each is then scored through its own posting lists
+        (accumulated()), so a batch costs the sum of its queries' posting lists rather than a sparse
+        product against the whole catalogue. A query whose own part fails (e.g. an unknown facet)
+        gets its exception in place of its rows; the others still get theirs.
+        """
+        if not queries:
+            return []
+        user_vecs = None
+        if self.job_vectors is not None and self.vectorizer is not None:
+            with stage("vectorizer_transform", rows=len(queries)):
+                user_vecs = self.vectorizer.transform([", ".join(tokens) for tokens, _, _ in queries])
+
+        results = []
+        for q, (tokens, k, filters) in enumerate(queries):
+            try:
+                terms = None
+                if user_vecs is not None and len(tokens):
+                    lo, hi = user_vecs.indptr[q], user_vecs.indptr[q + 1]
+                    terms = user_vecs.indices[lo:hi], user_vecs.data[lo:hi]
+                results.append(self.select_user_rows(tokens, self.user_skill_ids(tokens), terms, k, filters,
+                                                     ann_probes=0))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def results_frame(self, user_skill_tokens, rows):
+        """rank_jobs-style DataFrame for the given rows, in the given order."""
+        ids, overlap, match_percent, ml_score, final_score = self.scores(user_skill_tokens, rows)
+        with stage("results_frame", rows=len(rows)):
+            df = self.jobs_df.iloc[rows].copy()
+            df["Matched Skills"] = self.matched_skills(rows, ids, overlap)
+            df["Match %"] = match_percent
+            df["ML Score"] = ml_score
+            df["Final Score"] = final_score
+        return df
+
+    def analysis(self, user_skill_tokens, rows):
+        """Chart data for ranked rows, from the skill matrix rather than the Matched Skills strings.
+
+        Returns a dict with matched_total / unmatched_total (user skill slots over all rows), one
+        label and Match % per row, and matched_skills / skill_counts (how many rows match each skill).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = self.user_skill_ids(user_skill_tokens)
+        sub = self.skill_matrix[rows][:, ids]
+        overlap = np.asarray(sub.sum(axis=1)).ravel().astype(np.int64)
+        skill_counts = np.asarray(sub.sum(axis=0)).ravel().astype(np.int64)
+        matched_total = int(overlap.sum())
+        titles = self.jobs_df["job_title"].iloc[rows] if "job_title" in self.jobs_df.columns else rows
+        return {
+            "matched_total": matched_total,
+            "unmatched_total": max(0, len(user_skill_tokens) * len(rows) - matched_total),
+            # Ranked labels stay distinct when two jobs share a title
+            "labels": [f"{rank}. {title}" for rank, title in enumerate(titles, 1)],
+            "match_percent": self.match_percent(overlap, user_skill_tokens, len(ids)),
+            "matched_skills": self.skill_names[ids][skill_counts > 0],
+            "skill_counts": skill_counts[skill_counts > 0],
+        }
+
+    def top_k(self, user_skill_tokens, k=10, filters=None):
+        """Best k jobs as a DataFrame with the same columns as rank_jobs, built only for the winners.
+
+        Only jobs on the posting lists of the user's skills/terms are scored (see select_rows).
+        Ties on Final Score are broken by catalogue row order.
+        """
+        return self.results_frame(user_skill_tokens, self.select_rows(user_skill_tokens, k, filters))
+
+    def top_k_batch(self, queries):
+        """top_k for a list of (user_skill_tokens, k, filters) queries, scored together.
+
+        As in select_rows_batch, a failed query's entry is its exception.
+        """
+        frames = []
+        for (tokens, _, _), rows in zip(queries, self.select_rows_batch(queries)):
+            try:
+                frames.append(rows if isinstance(rows, Exception) else self.results_frame(tokens, rows))
+            except Exception as e:
+                frames.append(e)
+        return frames
+
+
+def result_records(top_jobs):
+    # JSON-friendly rows of a top_k DataFrame
+    return [
+        {"rank": rank, "row": int(row), "job_title": str(job.get("job_title", "")),
+         "company": str(job.get("company", "")), "location": str(job.get("location", "")),
+         "matched_skills": job["Matched Skills"], "match_percent": float(job["Match %"]),
+         "ml_score": float(job["ML Score"]), "final_score": float(job["Final Score"])}
+        for rank, (row, job) in enumerate(top_jobs.iterrows(), 1)
+    ]
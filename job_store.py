@@ -0,0 +1,156 @@
+# job_store.py - Typed, columnar copy of the job catalogue CSV
+#
+#   python job_store.py jobs_cleaned.csv        # (re)build job_store/ from a catalogue CSV
+#
+# One .npy array per column: text columns are dictionary encoded (int32 codes + their distinct strings)
+# and load as pandas categoricals, numeric columns such as salary keep their dtype (missing = NaN).
+# Arrays are memory-mapped and load_job_store(columns=[...]) only opens the requested ones. The manifest
+# records the CSV's SHA-256, so a store built from another version of the CSV is never used.
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+STORE_DIR = "job_store"
+STORE_VERSION = 1
+
+_hash_memo = {}
+
+
+def csv_hash(path, chunk_size=1 << 20):
+    # Memoised per (path, size, mtime), so the several freshness checks at startup read the file once
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        _hash_memo[key] = h.hexdigest()
+    return _hash_memo[key]
+
+def read_jobs_csv(path, columns=None):
+    # Missing text becomes "", missing numbers stay NaN (a blanket fillna("") would make them object columns)
+    df = pd.read_csv(path, usecols=columns)
+    text_cols = [c for c in df.columns if not is_numeric_dtype(df[c])]
+    df[text_cols] = df[text_cols].fillna("")
+    return df
+
+
+# --------------------------
+# Build
+# --------------------------
+# Artifact directories are written into <dir>.tmp and swapped in whole, so readers never see a half
+# written one (used here and by model_bundle.write_bundle)
+def fresh_tmp_dir(target_dir):
+    """Empty <target_dir>.tmp to build into; leftovers of a crashed build are removed first."""
+    tmp_dir = target_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir
+
+def swap_dir(tmp_dir, target_dir):
+    """Move the finished tmp_dir to target_dir, replacing (then deleting) the previous one."""
+    old_dir = target_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target_dir):
+        os.replace(target_dir, old_dir)
+    os.replace(tmp_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def build_job_store(jobs_df, csv_path, store_dir=STORE_DIR):
+    """Write jobs_df (the parsed contents of csv_path) as a typed column store; returns the manifest."""
+    tmp_dir = fresh_tmp_dir(store_dir)
+    columns = []
+    for i, col in enumerate(jobs_df.columns):
+        values = jobs_df[col]
+        if is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp_dir, f"col{i}.values.npy"), values.to_numpy())
+            columns.append({"name": col, "kind": "numeric", "dtype": str(values.dtype)})
+        else:
+            codes, categories = pd.factorize(values.astype(str).fillna(""))
+            np.save(os.path.join(tmp_dir, f"col{i}.codes.npy"), codes.astype(np.int32))
+            with open(os.path.join(tmp_dir, f"col{i}.categories.json"), "w") as f:
+                json.dump([str(c) for c in categories], f)
+            columns.append({"name": col, "kind": "category", "n_categories": len(categories)})
+    manifest = {
+        "store_version": STORE_VERSION,
+        "csv": os.path.basename(csv_path),
+        "csv_sha256": csv_hash(csv_path),
+        "n_rows": len(jobs_df),
+        "columns": columns,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    swap_dir(tmp_dir, store_dir)
+    return manifest
+
+def append_job_store(store_df, new_jobs, csv_path, store_dir=STORE_DIR):
+    """Rebuild the store for csv_path after new_jobs were appended to it, without re-parsing the CSV."""
+    new_jobs = new_jobs.reindex(columns=store_df.columns)
+    for col in store_df.columns:
+        if is_numeric_dtype(store_df[col]) and not isinstance(store_df[col].dtype, pd.CategoricalDtype):
+            new_jobs[col] = pd.to_numeric(new_jobs[col], errors="coerce")
+        else:
+            new_jobs[col] = new_jobs[col].fillna("").astype(str)
+    combined = pd.concat([store_df.astype({c: str for c in store_df.columns
+                                           if isinstance(store_df[c].dtype, pd.CategoricalDtype)}), new_jobs],
+                         ignore_index=True)
+    return build_job_store(combined, csv_path, store_dir)
+
+
+# --------------------------
+# Load
+# --------------------------
+def read_store_manifest(store_dir=STORE_DIR):
+    path = os.path.join(store_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_job_store(csv_path, columns=None, store_dir=STORE_DIR, mmap_mode="r"):
+    """Typed DataFrame for csv_path from the store, or None if there is none or it is stale.
+
+    Only `columns` (default: all; a list of names or a predicate on them) are read; text columns come
+    back as categoricals.
+    """
+    manifest = read_store_manifest(store_dir)
+    if (manifest is None or manifest.get("store_version") != STORE_VERSION
+            or manifest.get("csv_sha256") != csv_hash(csv_path)):
+        return None
+    positions = {c["name"]: i for i, c in enumerate(manifest["columns"])}
+    if columns is None:
+        wanted = list(positions)
+    elif callable(columns):
+        wanted = [c for c in positions if columns(c)]
+    else:
+        wanted = [c for c in columns if c in positions]
+    data = {}
+    for col in wanted:
+        i = positions[col]
+        if manifest["columns"][i]["kind"] == "numeric":
+            data[col] = np.load(os.path.join(store_dir, f"col{i}.values.npy"), mmap_mode=mmap_mode)
+        else:
+            with open(os.path.join(store_dir, f"col{i}.categories.json")) as f:
+                categories = json.load(f)
+            codes = np.load(os.path.join(store_dir, f"col{i}.codes.npy"), mmap_mode=mmap_mode)
+            data[col] = pd.Categorical.from_codes(codes, categories=categories, validate=False)
+    return pd.DataFrame(data, columns=wanted)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "jobs_cleaned.csv"
+    start = time.perf_counter()
+    manifest = build_job_store(read_jobs_csv(csv_path), csv_path)
+    kinds = ", ".join(f"{c['name']} ({c['kind']})" for c in manifest["columns"])
+    print(f"Job store for {csv_path}: {manifest['n_rows']} rows in {time.perf_counter() - start:.2f}s")
+    print(f"Columns: {kinds}")
@@ -1,7 +1,7 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import pickle
+from parallel_build import WORKERS, parallel_neighbours, parallel_tfidf
+from similar_jobs import NEIGHBOURS_FILE, save_neighbours, similar_jobs
 
 df = pd.read_csv("jobs_cleaned.csv")
 
@@ -12,22 +12,23 @@ df["combined"] = (
     df["industry"].fillna('')
 )
 
-#Initialize TF-IDF Vectorizer
-# TF-IDF converts text into numerical features
-vectorizer = TfidfVectorizer(stop_words="english")
+#Fit the TF-IDF Vectorizer and transform the combined text data
+# TF-IDF converts text into numerical features; the catalogue is tokenised in shards on every core
+# and gives the same fitted TfidfVectorizer as a single-process fit_transform
+vectorizer, tfidf_matrix = parallel_tfidf(df["combined"], WORKERS, stop_words="english")
 
-#Transform the combined text data
-tfidf_matrix = vectorizer.fit_transform(df["combined"])
-
-#Compute similarity between jobs
-similarity = cosine_similarity(tfidf_matrix)
+#Compute the most similar jobs for every job
+# Only the top 20 neighbours per job are kept (N x 20 instead of a dense N x N matrix),
+# computed in blocks of rows so memory stays bounded for large catalogues, blocks spread over every core
+neighbour_ids, neighbour_scores = parallel_neighbours(tfidf_matrix, m=20, workers=WORKERS)
 
 #Save models
-pickle.dump(vectorizer, open("vectorizer.pkl", "wb"))
-pickle.dump(similarity, open("similarity.pkl", "wb"))
+# Kept apart from the app's model bundle (create_model_files.py), which uses a skills-only CountVectorizer
+pickle.dump(vectorizer, open("tfidf_vectorizer.pkl", "wb"))
+save_neighbours(neighbour_ids, neighbour_scores)
 
 print("ML Model training completed successfully!")
-print("Files saved: vectorizer.pkl and similarity.pkl")
+print(f"Files saved: tfidf_vectorizer.pkl and {NEIGHBOURS_FILE}")
 
 #Define a function to recommend jobs
 def recommend_jobs(job_title):
@@ -36,8 +37,7 @@ def recommend_jobs(job_title):
         return []
 
     index = df[df['job_title'] == job_title].index[0]
-    distances = similarity[index]
-    job_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:6]
+    job_list = similar_jobs(neighbour_ids, neighbour_scores, index, 5)
 
     print(f"\nTop 5 Job Recommendations for '{job_title}':\n")
     for i in job_list:
@@ -0,0 +1,269 @@
+# model_bundle.py - Versioned on-disk artifacts shared by the offline build and the Streamlit app
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from job_index import JobIndex, build_skill_matrix, postings_matrix, row_norms
+from job_store import csv_hash, fresh_tmp_dir, swap_dir
+from parallel_build import parallel_count_vectors, parallel_intern_skills
+
+BUNDLE_VERSION = 5
+BUNDLE_DIR = "model_bundle"
+VECTORIZER_PARAMS = {"stop_words": "english"}
+
+
+def make_vectorizer(vocabulary=None):
+    return CountVectorizer(vocabulary=vocabulary, **VECTORIZER_PARAMS)
+
+def fit_skill_vectors(skill_texts, workers=1):
+    """Interned skills plus the fitted term vectorizer, without tokenising each job's text.
+
+    Every distinct skill is tokenised once; a job's term counts are its skill counts times the
+    skill x term matrix, which is exactly what CountVectorizer gives for the comma separated text.
+    workers > 1 interns and tokenises in shards over that many processes (same result).
+    Returns (vectorizer, job_vectors, skill_names, skill_matrix).
+    """
+    if workers > 1:
+        skill_names, skill_counts = build_skill_matrix(
+            skill_texts, binary=False, intern=lambda texts: parallel_intern_skills(texts, workers))
+        vectorizer, skill_terms = parallel_count_vectors(skill_names, workers, **VECTORIZER_PARAMS)
+    else:
+        skill_names, skill_counts = build_skill_matrix(skill_texts, binary=False)
+        vectorizer = make_vectorizer().fit(skill_names)
+        skill_terms = vectorizer.transform(skill_names)
+    job_vectors = (skill_counts @ skill_terms).tocsr()
+    job_vectors.sort_indices()
+    skill_matrix = skill_counts.copy()
+    skill_matrix.data[:] = 1
+    return vectorizer, job_vectors, skill_names, skill_matrix
+
+# CSR matrices and numeric columns are stored as plain .npy arrays so every app process can
+# np.load(..., mmap_mode="r") them and share a single page-cache copy per host.
+def save_csr(bundle_dir, name, matrix):
+    for part in ("data", "indices", "indptr"):
+        np.save(os.path.join(bundle_dir, f"{name}.{part}.npy"), getattr(matrix, part))
+    return list(matrix.shape)
+
+def load_csr(bundle_dir, name, shape, mmap_mode="r"):
+    data, indices, indptr = (np.load(os.path.join(bundle_dir, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+                             for part in ("data", "indices", "indptr"))
+    return sparse.csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+
+
+class ModelBundle:
+    def __init__(self, manifest, vectorizer, job_vectors, row_ids, skill_names, skill_matrix, numeric_columns,
+                 retired, term_postings, skill_postings, job_norms):
+        self.manifest = manifest
+        self.vectorizer = vectorizer
+        self.job_vectors = job_vectors
+        self.row_ids = row_ids
+        self.skill_names = skill_names
+        self.skill_matrix = skill_matrix
+        self.numeric_columns = numeric_columns
+        self.retired = retired
+        self.term_postings = term_postings
+        self.skill_postings = skill_postings
+        self.job_norms = job_norms
+
+    @property
+    def version(self):
+        # Retiring jobs leaves the CSV alone, so the update time is part of the version
+        return f"{self.manifest['csv_sha256']}:{self.manifest.get('updated_at', '')}"
+
+
+# --------------------------
+# Build (offline)
+# --------------------------
+def write_bundle(bundle_dir, manifest, vocabulary, skill_names, job_vectors, skill_matrix, row_ids,
+                 numeric_columns, retired):
+    # Write into a temp dir and swap it in, so readers never see a half written bundle
+    tmp_dir = fresh_tmp_dir(bundle_dir)
+    with open(os.path.join(tmp_dir, "vocabulary.json"), "w") as f:
+        json.dump(vocabulary, f)
+    with open(os.path.join(tmp_dir, "skill_names.json"), "w") as f:
+        json.dump(list(skill_names), f)
+    shapes = {"job_vectors": save_csr(tmp_dir, "job_vectors", job_vectors),
+              "skill_matrix": save_csr(tmp_dir, "skill_matrix", skill_matrix),
+              "term_postings": save_csr(tmp_dir, "term_postings", postings_matrix(job_vectors)),
+              "skill_postings": save_csr(tmp_dir, "skill_postings", postings_matrix(skill_matrix))}
+    # Job-side L2 norms, so cosine scoring never recomputes them per request
+    np.save(os.path.join(tmp_dir, "job_norms.npy"), row_norms(job_vectors))
+    np.save(os.path.join(tmp_dir, "row_ids.npy"), row_ids)
+    np.save(os.path.join(tmp_dir, "retired.npy"), retired)
+    for col, values in numeric_columns.items():
+        np.save(os.path.join(tmp_dir, f"column.{col}.npy"), values)
+    manifest = {
+        **manifest,
+        "bundle_version": BUNDLE_VERSION,
+        "n_jobs": len(row_ids),
+        "n_retired": int(retired.sum()),
+        "n_terms": len(vocabulary),
+        "n_skills": len(skill_names),
+        "shapes": shapes,
+        "numeric_columns": list(numeric_columns),
+        "vectorizer": VECTORIZER_PARAMS,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    swap_dir(tmp_dir, bundle_dir)
+    return manifest
+
+def numeric_job_columns(jobs_df):
+    return {col: jobs_df[col].to_numpy(dtype=np.float64) for col in jobs_df.columns if is_numeric_dtype(jobs_df[col])}
+
+def build_bundle(jobs_df, skill_col, csv_path, bundle_dir=BUNDLE_DIR, workers=1):
+    """Fit the skill vectorizer over jobs_df (loaded from csv_path) and write the bundle to bundle_dir."""
+    vectorizer, job_vectors, skill_names, skill_matrix = fit_skill_vectors(jobs_df[skill_col], workers)
+    manifest = {
+        "csv": os.path.basename(csv_path),
+        "csv_sha256": csv_hash(csv_path),
+        "skill_col": skill_col,
+        "n_oov_terms": 0,
+        "n_appended_terms": 0,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+    return write_bundle(bundle_dir, manifest, vocabulary, skill_names, job_vectors, skill_matrix,
+                        np.arange(len(jobs_df), dtype=np.int64), numeric_job_columns(jobs_df),
+                        np.zeros(len(jobs_df), dtype=bool))
+
+
+# --------------------------
+# Load (read-only)
+# --------------------------
+def read_manifest(bundle_dir=BUNDLE_DIR):
+    path = os.path.join(bundle_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_bundle(csv_path, skill_col, bundle_dir=BUNDLE_DIR, mmap_mode="r"):
+    """Load the bundle for csv_path, or None if it is missing, from another version or stale.
+
+    Arrays are memory-mapped read-only by default; pass mmap_mode=None to read them into memory.
+    """
+    manifest = read_manifest(bundle_dir)
+    if (manifest is None or manifest.get("bundle_version") != BUNDLE_VERSION
+            or manifest.get("skill_col") != skill_col or manifest.get("csv_sha256") != csv_hash(csv_path)):
+        return None
+    with open(os.path.join(bundle_dir, "vocabulary.json")) as f:
+        vectorizer = make_vectorizer(json.load(f))
+    with open(os.path.join(bundle_dir, "skill_names.json")) as f:
+        skill_names = np.asarray(json.load(f), dtype=object)
+    shapes = manifest["shapes"]
+    job_vectors = load_csr(bundle_dir, "job_vectors", shapes["job_vectors"], mmap_mode)
+    skill_matrix = load_csr(bundle_dir, "skill_matrix", shapes["skill_matrix"], mmap_mode)
+    term_postings = load_csr(bundle_dir, "term_postings", shapes["term_postings"], mmap_mode)
+    skill_postings = load_csr(bundle_dir, "skill_postings", shapes["skill_postings"], mmap_mode)
+    row_ids = np.load(os.path.join(bundle_dir, "row_ids.npy"), mmap_mode=mmap_mode)
+    job_norms = np.load(os.path.join(bundle_dir, "job_norms.npy"), mmap_mode=mmap_mode)
+    numeric_columns = {col: np.load(os.path.join(bundle_dir, f"column.{col}.npy"), mmap_mode=mmap_mode)
+                       for col in manifest["numeric_columns"]}
+    retired = np.load(os.path.join(bundle_dir, "retired.npy"), mmap_mode=mmap_mode)
+    return ModelBundle(manifest, vectorizer, job_vectors, row_ids, skill_names, skill_matrix, numeric_columns,
+                       retired, term_postings, skill_postings, job_norms)
+
+
+def open_job_index(jobs_df, skill_col, jobs_path, bundle_dir=BUNDLE_DIR):
+    """JobIndex over jobs_df from the prebuilt bundle, refitting in memory (never writing) when it is stale."""
+    bundle = load_bundle(jobs_path, skill_col, bundle_dir) if jobs_path and skill_col else None
+    if bundle is not None and len(bundle.row_ids) == len(jobs_df):
+        return JobIndex(jobs_df, skill_col, bundle.vectorizer, bundle.job_vectors, bundle.skill_names,
+                        bundle.skill_matrix, bundle.retired, bundle.version, bundle.numeric_columns,
+                        bundle.skill_postings, bundle.term_postings, bundle.job_norms)
+    version = csv_hash(jobs_path) if jobs_path else None
+    if not skill_col:
+        return JobIndex(jobs_df, skill_col, make_vectorizer(), version=version)
+    vectorizer, job_vectors, skill_names, skill_matrix = fit_skill_vectors(jobs_df[skill_col])
+    return JobIndex(jobs_df, skill_col, vectorizer, job_vectors, skill_names, skill_matrix, version=version)
+
+
+# --------------------------
+# Incremental updates
+# --------------------------
+# New postings are appended with the existing term vocabulary (terms it does not know are counted
+# in the manifest as n_oov_terms); the skill vocabulary simply grows. Retired postings are tombstoned
+# and skipped by JobIndex. compact_bundle() drops tombstoned rows and refits the vocabulary.
+def load_fresh_bundle(csv_path, bundle_dir):
+    manifest = read_manifest(bundle_dir)
+    skill_col = manifest["skill_col"] if manifest else None
+    bundle = load_bundle(csv_path, skill_col, bundle_dir, mmap_mode=None) if skill_col else None
+    if bundle is None:
+        raise ValueError(f"{bundle_dir} is missing or stale for {csv_path}; rebuild it with create_model_files.py")
+    return bundle
+
+def append_jobs(new_jobs, csv_path, bundle_dir=BUNDLE_DIR):
+    """Append new job rows (same columns as csv_path) to the CSV and the bundle without refitting."""
+    bundle = load_fresh_bundle(csv_path, bundle_dir)
+    skill_col = bundle.manifest["skill_col"]
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    new_jobs = new_jobs.reindex(columns=columns).fillna("")
+    texts = new_jobs[skill_col].astype(str)
+
+    new_vectors = bundle.vectorizer.transform(texts).tocsr()
+    analyzer = bundle.vectorizer.build_analyzer()
+    terms = [term for text in texts for term in analyzer(text)]
+    oov_terms = sum(term not in bundle.vectorizer.vocabulary_ for term in terms)
+    job_vectors = sparse.vstack([bundle.job_vectors, new_vectors], format="csr")
+
+    # Map the new rows' skills onto existing skill ids, adding columns for unseen skills
+    new_names, new_skills = build_skill_matrix(texts)
+    skill_ids = {name: i for i, name in enumerate(bundle.skill_names)}
+    unseen = [name for name in new_names if name not in skill_ids]
+    skill_names = np.concatenate([bundle.skill_names, np.asarray(unseen, dtype=object)])
+    skill_ids.update((name, len(bundle.skill_names) + i) for i, name in enumerate(unseen))
+    remap = np.array([skill_ids[name] for name in new_names], dtype=np.int32)
+    new_skills = sparse.csr_matrix((new_skills.data, remap[new_skills.indices], new_skills.indptr),
+                                   shape=(new_skills.shape[0], len(skill_names)))
+    old_skills = sparse.csr_matrix((bundle.skill_matrix.data, bundle.skill_matrix.indices,
+                                    bundle.skill_matrix.indptr), shape=(len(bundle.row_ids), len(skill_names)))
+    skill_matrix = sparse.vstack([old_skills, new_skills], format="csr")
+    skill_matrix.sort_indices()
+
+    n_old, n_new = len(bundle.row_ids), len(new_jobs)
+    row_ids = np.arange(n_old + n_new, dtype=np.int64)
+    numeric_columns = {col: np.concatenate([values, pd.to_numeric(new_jobs[col], errors="coerce").to_numpy(np.float64)])
+                       for col, values in bundle.numeric_columns.items()}
+    retired = np.concatenate([bundle.retired, np.zeros(n_new, dtype=bool)])
+
+    new_jobs.to_csv(csv_path, mode="a", header=False, index=False)
+    manifest = {**bundle.manifest, "csv_sha256": csv_hash(csv_path),
+                "n_oov_terms": bundle.manifest.get("n_oov_terms", 0) + oov_terms,
+                "n_appended_terms": bundle.manifest.get("n_appended_terms", 0) + len(terms)}
+    vocabulary = {term: int(i) for term, i in bundle.vectorizer.vocabulary_.items()}
+    return write_bundle(bundle_dir, manifest, vocabulary, skill_names, job_vectors, skill_matrix, row_ids,
+                        numeric_columns, retired)
+
+def retire_jobs(row_ids, csv_path, bundle_dir=BUNDLE_DIR):
+    """Tombstone rows so they are no longer ranked; the CSV is left untouched until compaction."""
+    bundle = load_fresh_bundle(csv_path, bundle_dir)
+    retired = np.array(bundle.retired, dtype=bool)
+    retired[np.asarray(row_ids, dtype=np.int64)] = True
+    tmp = os.path.join(bundle_dir, "retired.tmp.npy")
+    np.save(tmp, retired)
+    os.replace(tmp, os.path.join(bundle_dir, "retired.npy"))
+    manifest = {**bundle.manifest, "n_retired": int(retired.sum()), "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    tmp = os.path.join(bundle_dir, "manifest.tmp.json")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(bundle_dir, "manifest.json"))
+    return manifest
+
+def compact_bundle(csv_path, bundle_dir=BUNDLE_DIR):
+    """Drop tombstoned rows from the CSV and rebuild the bundle with a freshly fitted vocabulary."""
+    bundle = load_fresh_bundle(csv_path, bundle_dir)
+    jobs_df = pd.read_csv(csv_path)
+    jobs_df = jobs_df[~np.asarray(bundle.retired, dtype=bool)]
+    tmp = csv_path + ".tmp"
+    jobs_df.to_csv(tmp, index=False)
+    os.replace(tmp, csv_path)
+    return build_bundle(jobs_df.fillna(""), bundle.manifest["skill_col"], csv_path, bundle_dir)
@@ -0,0 +1,30 @@
+# nlp_resources.py - Lazily loaded NLP resources for the resume path
+from functools import lru_cache
+
+# NLTK's English stop word list, bundled so the app starts without a network download
+STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves
+he him his himself she she's her hers herself it it's its itself they them their theirs themselves
+what which who whom this that that'll these those am is are was were be been being have has had
+having do does did doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in out on off over
+under again further then once here there when where why how all any both each few more most other
+some such no nor not only own same so than too very s t can will just don don't should should've
+now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+# Only token.lemma_ is used; the lemmatizer needs tok2vec/tagger/attribute_ruler but not these
+UNUSED_PIPES = ["parser", "ner"]
+
+
+@lru_cache(maxsize=None)
+def get_nlp():
+    """spaCy pipeline for lemmatisation, loaded on first use and shared by the process."""
+    import spacy
+    try:
+        return spacy.load("en_core_web_sm", exclude=UNUSED_PIPES)
+    except Exception:
+        from spacy.lang.en import English
+        return English()
@@ -1,5 +1,10 @@
 import streamlit as st
+import os
 import random
+from faq_index import FaqIndex, load_faq_corpus, merge_faq
+
+# Optional larger FAQ corpus ({category: {question: answer}}), merged over the built-in entries
+FAQ_FILE = "faq.json"
 
 # -----------------------------
 # Page Config
@@ -181,12 +186,19 @@ def get_random_examples():
     all_questions = [q for cat in faq_data.values() for q in cat.keys()]
     return random.sample(all_questions, min(4, len(all_questions)))
 
+@st.cache_resource
+def load_faq_index(faq_mtime):
+    # Built once per process (and again only when faq.json changes)
+    corpus = merge_faq(faq_data, load_faq_corpus(FAQ_FILE)) if faq_mtime else faq_data
+    return FaqIndex(corpus)
+
+faq_index = load_faq_index(os.path.getmtime(FAQ_FILE) if os.path.exists(FAQ_FILE) else None)
+
 def find_answer(user_question):
-    user_question = user_question.lower()
-    for category, qa in faq_data.items():
-        for question, answer in qa.items():
-            if user_question in question.lower() or question.lower() in user_question:
-                return f"**{category} Tip:** {answer}"
+    hit = faq_index.best(user_question)
+    if hit:
+        category, _, answer, confidence = hit
+        return f"**{category} Tip:** {answer}\n\n_Confidence: {confidence:.0%}_"
     return "⚠️ I’m still learning that topic 😅 — but you can ask me about **resumes, skills, interviews, jobs, or projects!**"
 
 # -----------------------------
@@ -0,0 +1,141 @@
+# parallel_build.py - Multi-process building blocks for the offline model build
+#
+# The catalogue is cut into contiguous row shards that worker processes tokenise / score independently;
+# the parent merges the shard vocabularies and stitches the results back in row order, so every
+# function here returns exactly what its single-process counterpart does.
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+from job_index import intern_skills
+from similar_jobs import build_neighbours
+
+# Default: every core. Without fork (Windows) workers re-import the calling script, so only callers
+# with a __main__ guard should ask for more than one there
+WORKERS = (os.cpu_count() or 1) if "fork" in multiprocessing.get_all_start_methods() else 1
+# Shards smaller than this are not worth a process round trip
+MIN_SHARD_ROWS = 5_000
+
+# Set in each worker by _init_worker (inherited, not pickled, when processes are forked)
+_shared = None
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+def process_pool(workers, shared):
+    # fork shares the inputs with the workers for free; spawn pickles them once per worker
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(shared,))
+
+def shard_bounds(n_rows, workers, min_rows=MIN_SHARD_ROWS):
+    n_shards = max(1, min(workers, n_rows // min_rows))
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(np.int64)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+# --------------------------
+# Skill interning
+# --------------------------
+def _intern_shard(bounds):
+    return intern_skills(_shared[bounds[0]:bounds[1]])
+
+def parallel_intern_skills(skill_texts, workers=WORKERS):
+    """intern_skills() over row shards in parallel; same (skill_names, offsets, ids) as the serial call."""
+    shards = shard_bounds(len(skill_texts), workers)
+    if len(shards) == 1:
+        return intern_skills(skill_texts)
+    with process_pool(len(shards), skill_texts) as pool:
+        parts = list(pool.map(_intern_shard, shards))
+
+    # Shard vocabularies are in first-appearance order, so factorizing their concatenation in shard
+    # order gives the global first-appearance numbering
+    all_names = np.concatenate([names for names, _, _ in parts])
+    global_ids, skill_names = pd.factorize(all_names)
+    ids, offsets, start, row_start = [], [np.zeros(1, dtype=np.int64)], 0, 0
+    for names, shard_offsets, shard_ids in parts:
+        ids.append(global_ids[start:start + len(names)][shard_ids].astype(np.int32))
+        offsets.append(shard_offsets[1:] + row_start)
+        start += len(names)
+        row_start += shard_offsets[-1]
+    return np.asarray(skill_names, dtype=object), np.concatenate(offsets), np.concatenate(ids)
+
+
+# --------------------------
+# Text vectorisation
+# --------------------------
+def _fit_shard(args):
+    bounds, params = args
+    vectorizer = CountVectorizer(**params)
+    try:
+        vectorizer.fit(_shared[bounds[0]:bounds[1]])
+    except ValueError:
+        return []  # a shard without any term
+    return list(vectorizer.vocabulary_)
+
+def _transform_shard(args):
+    bounds, params, vocabulary = args
+    return CountVectorizer(vocabulary=vocabulary, **params).transform(_shared[bounds[0]:bounds[1]])
+
+def parallel_count_vectors(texts, workers=WORKERS, **params):
+    """CountVectorizer(**params).fit_transform(texts) over row shards: fit the shards, merge the
+    vocabularies (sorted, as CountVectorizer numbers terms), then transform the shards with it.
+
+    Returns (vectorizer, counts). Only parameters that act per document (analyzer, ngrams, stop words...)
+    are supported; min_df/max_df/max_features need corpus-wide counts.
+    """
+    texts = list(texts)
+    shards = shard_bounds(len(texts), workers)
+    if len(shards) == 1:
+        vectorizer = CountVectorizer(**params)
+        return vectorizer, vectorizer.fit_transform(texts)
+    with process_pool(len(shards), texts) as pool:
+        terms = set()
+        for shard_terms in pool.map(_fit_shard, [(b, params) for b in shards]):
+            terms.update(shard_terms)
+        vocabulary = {term: i for i, term in enumerate(sorted(terms))}
+        counts = sparse.vstack(list(pool.map(_transform_shard, [(b, params, vocabulary) for b in shards])),
+                               format="csr")
+    # fit([]) with a fixed vocabulary only sets vocabulary_, as a fit over the texts would have
+    return CountVectorizer(vocabulary=vocabulary, **params).fit([]), counts
+
+def parallel_tfidf(texts, workers=WORKERS, **params):
+    """TfidfVectorizer(**params).fit_transform(texts) from parallel term counts; returns (vectorizer, matrix).
+
+    params are the tokenising options (see parallel_count_vectors); the tf-idf weighting is the default.
+    The vectorizer is a plain fitted TfidfVectorizer (same vocabulary_ and idf_), so it pickles and
+    transforms new text like one fitted in a single process.
+    """
+    texts = list(texts)
+    counts_vectorizer, counts = parallel_count_vectors(texts, workers, **params)
+    transformer = TfidfTransformer()
+    matrix = transformer.fit_transform(counts)
+    # Fitted on one document for its fixed vocabulary, then given the idf of the whole corpus
+    vectorizer = TfidfVectorizer(vocabulary=counts_vectorizer.vocabulary_, **params).fit(texts[:1])
+    vectorizer.idf_ = transformer.idf_
+    return vectorizer, matrix
+
+
+# --------------------------
+# Neighbours
+# --------------------------
+def _neighbour_block(args):
+    start, stop, m, block_size = args
+    return build_neighbours(_shared, m, block_size, rows=(start, stop))
+
+def parallel_neighbours(tfidf_matrix, m=20, workers=WORKERS, block_size=512):
+    """similar_jobs.build_neighbours() with row blocks spread over worker processes."""
+    X = tfidf_matrix.tocsr()
+    shards = shard_bounds(X.shape[0], workers * 4, min_rows=block_size)
+    if workers <= 1 or len(shards) == 1:
+        return build_neighbours(X, m, block_size)
+    with process_pool(workers, X) as pool:
+        parts = list(pool.map(_neighbour_block, [(start, stop, m, block_size) for start, stop in shards]))
+    return np.concatenate([ids for ids, _ in parts]), np.concatenate([scores for _, scores in parts])
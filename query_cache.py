@@ -0,0 +1,67 @@
+# query_cache.py - Process-wide LRU/TTL cache for ranking results
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_skills(user_skill_tokens):
+    # Same skills in any order / with repeats -> same query
+    return tuple(sorted(set(user_skill_tokens)))
+
+def query_key(user_skill_tokens, k, filters=None):
+    frozen_filters = tuple(sorted(
+        (col, tuple(sorted(map(str, v))) if isinstance(v, (list, tuple, set)) else str(v))
+        for col, v in (filters or {}).items()
+    ))
+    return normalize_skills(user_skill_tokens), k, frozen_filters
+
+
+class QueryCache:
+    """Thread-safe cache bounded by entry count (LRU) and age (TTL, seconds).
+
+    Entries belong to one catalogue version; passing a new version drops everything cached
+    for the old one.
+    """
+
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, version, compute):
+        now = time.monotonic()
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,292 @@
+# ranking_service.py - Headless async HTTP/JSON ranking service with request micro-batching
+#
+#   python ranking_service.py --port 8765
+#   curl -s localhost:8765/rank -d '{"skills": ["python", "sql"], "k": 5}'
+#   curl -s localhost:8765/extract -d '{"text": "Experienced in machine learning and SQL"}'
+#   curl -s localhost:8765/metrics
+#   python ranking_service.py --selftest        # in-process LocalClient, no sockets
+#
+# Rank requests that arrive within --batch-window-ms of each other are scored together with
+# JobIndex.top_k_batch (one vectorizer transform per batch, then each query through its posting lists).
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from instrumentation import STAGE_METRICS, request
+from job_index import detect_skill_column, load_jobs_df, ranking_columns, result_records
+from model_bundle import open_job_index
+from nlp_resources import STOP_WORDS
+from resume_parser import nlp_extract_skills_from_text
+from skill_extractor import SkillMatcher
+
+MAX_BODY_BYTES = 1 << 20
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ServiceMetrics:
+    def __init__(self, window=2048):
+        self.requests = {}
+        self.batches = 0
+        self.batched_queries = 0
+        self.max_batch = 0
+        self.queue_wait_ms = deque(maxlen=window)
+        self.latency_ms = deque(maxlen=window)
+
+    def count(self, endpoint):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_queries += size
+        self.max_batch = max(self.max_batch, size)
+
+    def render(self, queue_depth):
+        # Prometheus text exposition format
+        lines = ["# TYPE ranking_requests_total counter"]
+        lines += [f'ranking_requests_total{{endpoint="{e}"}} {n}' for e, n in sorted(self.requests.items())]
+        lines += ["# TYPE ranking_queue_depth gauge", f"ranking_queue_depth {queue_depth}",
+                  "# TYPE ranking_batches_total counter", f"ranking_batches_total {self.batches}",
+                  "# TYPE ranking_batch_size_mean gauge",
+                  f"ranking_batch_size_mean {self.batched_queries / self.batches if self.batches else 0:.3f}",
+                  "# TYPE ranking_batch_size_max gauge", f"ranking_batch_size_max {self.max_batch}"]
+        for name, values in [("ranking_queue_wait_ms", self.queue_wait_ms), ("ranking_latency_ms", self.latency_ms)]:
+            lines.append(f"# TYPE {name} summary")
+            for q in (0.5, 0.9, 0.99):
+                value = float(np.quantile(list(values), q)) if values else 0.0
+                lines.append(f'{name}{{quantile="{q}"}} {value:.3f}')
+            lines.append(f"{name}_count {len(values)}")
+        return "\n".join(lines) + "\n"
+
+
+class MicroBatcher:
+    """Collects rank queries for up to window_ms (or max_batch queries) and scores them together."""
+
+    def __init__(self, job_index, metrics, window_ms=5.0, max_batch=64):
+        self.job_index = job_index
+        self.metrics = metrics
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, skills, k, filters):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((skills, k, filters), future, time.perf_counter()))
+        return await future
+
+    def score(self, queries):
+        trace = request("rank_batch")
+        if trace is None:
+            return self.job_index.top_k_batch(queries)
+        with trace:
+            return self.job_index.top_k_batch(queries)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.metrics.queue_wait_ms.append((started - enqueued) * 1000)
+            self.metrics.record_batch(len(batch))
+            try:
+                # Scoring is CPU bound; keep the event loop free to accept requests meanwhile
+                frames = await loop.run_in_executor(None, self.score, [q for q, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            # A query that failed on its own gets its exception; the rest of the batch is unaffected
+            for (_, future, _), frame in zip(batch, frames):
+                if future.done():
+                    continue
+                if isinstance(frame, Exception):
+                    future.set_exception(frame)
+                else:
+                    future.set_result(frame)
+
+
+class RankingService:
+    def __init__(self, job_index, window_ms=5.0, max_batch=64):
+        self.job_index = job_index
+        self.matcher = SkillMatcher(job_index.skill_names, STOP_WORDS)
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(job_index, self.metrics, window_ms, max_batch)
+
+    async def handle(self, method, path, body):
+        """Route one request; returns (status, content_type, payload bytes)."""
+        path = path.split("?", 1)[0]
+        self.metrics.count(path)
+        start = time.perf_counter()
+        try:
+            if path == "/health":
+                return self.json(200, {"status": "ok", "jobs": len(self.job_index), "version": self.job_index.version})
+            if path == "/metrics":
+                text = self.metrics.render(self.batcher.queue.qsize()) + STAGE_METRICS.render()
+                return 200, "text/plain; version=0.0.4", text.encode()
+            if path not in ("/rank", "/extract"):
+                return self.json(404, {"error": f"unknown path {path}"})
+            if method != "POST":
+                return self.json(405, {"error": "use POST"})
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                return self.json(400, {"error": "request body must be a JSON object"})
+            if path == "/extract":
+                return self.json(200, {"skills": await self.extract(request)})
+            skills = request.get("skills")
+            if isinstance(skills, str):
+                skills = [s.strip().lower() for s in skills.split(",") if s.strip()]
+            if not isinstance(skills, list) or not all(isinstance(s, str) for s in skills):
+                return self.json(400, {"error": "skills must be a list of strings or a comma separated string"})
+            filters = request.get("filters") or {}
+            # Rejected here rather than in the batch, where they would fail the queries scored with them
+            if not isinstance(filters, dict):
+                return self.json(400, {"error": "filters must be an object"})
+            unknown = [f for f in filters if f not in self.job_index.facets.codes and f not in ("salary_min", "salary_max")]
+            if unknown:
+                return self.json(400, {"error": f"unknown filters: {', '.join(map(str, unknown))}"})
+            k = int(request.get("k", 10))
+            frame = await self.batcher.submit(list(dict.fromkeys(skills)), k, filters)
+            self.metrics.latency_ms.append((time.perf_counter() - start) * 1000)
+            return self.json(200, {"skills": skills, "jobs": result_records(frame)})
+        except (ValueError, KeyError, TypeError) as e:
+            return self.json(400, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            return self.json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    async def extract(self, request):
+        text = str(request.get("text", ""))
+        if not request.get("lemmatize", True):
+            return self.matcher.extract(text)
+        return await asyncio.get_running_loop().run_in_executor(None, nlp_extract_skills_from_text, text,
+                                                                self.matcher)
+
+    @staticmethod
+    def json(status, payload):
+        return status, "application/json", json.dumps(payload).encode()
+
+    # --------------------------
+    # HTTP/1.1 (one request per connection)
+    # --------------------------
+    async def serve_connection(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if len(request_line) < 2:
+                status, content_type, payload = self.json(400, {"error": "bad request line"})
+            elif length > MAX_BODY_BYTES:
+                status, content_type, payload = self.json(413, {"error": "body too large"})
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, content_type, payload = await self.handle(request_line[0], request_line[1], body)
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"Ranking service on http://{host}:{port} ({len(self.job_index)} jobs)")
+        async with server:
+            await server.serve_forever()
+
+
+class LocalClient:
+    """Stand-in client that calls the service in-process, for local testing without sockets."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        status, content_type, data = await self.service.handle(method, path, body)
+        return status, json.loads(data) if content_type == "application/json" else data.decode()
+
+    async def rank(self, skills, k=10, filters=None):
+        return await self.request("POST", "/rank", {"skills": skills, "k": k, "filters": filters or {}})
+
+    async def extract(self, text, lemmatize=True):
+        return await self.request("POST", "/extract", {"text": text, "lemmatize": lemmatize})
+
+    async def metrics(self):
+        return await self.request("GET", "/metrics")
+
+
+def load_service(window_ms=5.0, max_batch=64):
+    jobs_df, jobs_path = load_jobs_df(ranking_columns())
+    return RankingService(open_job_index(jobs_df, detect_skill_column(jobs_df), jobs_path), window_ms, max_batch)
+
+async def selftest(service, n_requests=200):
+    service.batcher.start()
+    client = LocalClient(service)
+    vocab = list(service.job_index.skill_names)
+    rng = np.random.default_rng(0)
+    queries = [list(rng.choice(vocab, size=min(3, len(vocab)), replace=False)) for _ in range(n_requests)]
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.rank(q, k=5) for q in queries))
+    elapsed = time.perf_counter() - start
+    # Batched results (always exact) must match the exact one-query-at-a-time path
+    for q, (status, payload) in zip(queries, responses):
+        assert status == 200, payload
+        assert [j["row"] for j in payload["jobs"]] == list(service.job_index.select_rows(q, 5, ann_probes=0))
+    print(f"{n_requests} concurrent requests in {elapsed * 1000:.1f} ms")
+    print((await client.metrics())[1])
+    await service.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve rank_jobs and the skill extractor over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--selftest", action="store_true", help="run concurrent requests through LocalClient and exit")
+    args = parser.parse_args(argv)
+
+    service = load_service(args.batch_window_ms, args.max_batch)
+    if args.selftest:
+        asyncio.run(selftest(service))
+    else:
+        asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# resume_parser.py - Resume text extraction and skill extraction (shared by the app and batch_score.py)
+#
+# Extractors are generators yielding one text chunk per PDF page / DOCX paragraph, so skill extraction
+# can start on the first pages and stop early. Large PDFs are parsed in worker processes, a few pages
+# per task. Parsed chunks are cached by file content hash.
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import docx
+from instrumentation import stage
+from nlp_resources import get_nlp
+from skill_extractor import tokenize
+
+MAX_BYTES = 10 * 2**20      # larger uploads are rejected
+MAX_PAGES = 40              # PDF pages (DOCX: paragraphs / 10) read at most
+PAGES_PER_TASK = 4
+PARALLEL_MIN_PAGES = 8      # smaller PDFs are parsed in-process
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+# Stop reading a resume once this many distinct skills were found (None reads everything)
+ENOUGH_SKILLS = 40
+TEXT_CACHE_SIZE = 64
+
+_pool = None
+_pool_lock = threading.Lock()
+_text_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_worker_reader = (None, None)  # (path, PdfReader) last opened by this worker process
+
+
+# --------------------------
+# Text extraction
+# --------------------------
+def read_capped(file, max_bytes=MAX_BYTES):
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"Resume is larger than {max_bytes / 2**20:.1f} MB")
+    return data
+
+def pdf_page_texts(path, start, stop):
+    # Runs in a worker process. Tasks only carry the spooled file's path and a page range; the
+    # reader is parsed once per worker and file, and reused for the file's later page ranges.
+    global _worker_reader
+    if _worker_reader[0] != path:
+        _worker_reader = (path, PyPDF2.PdfReader(path))
+    pages = _worker_reader[1].pages
+    return [pages[i].extract_text() or "" for i in range(start, min(stop, len(pages)))]
+
+def parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit process is multi-threaded
+            _pool = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def iter_pdf_pages(data, start=0, max_pages=MAX_PAGES, workers=PARSE_WORKERS):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    n_pages = min(len(reader.pages), max_pages)
+    if workers <= 1 or n_pages - start < PARALLEL_MIN_PAGES:
+        for i in range(start, n_pages):
+            with stage("pdf_parse", rows=1):
+                text = reader.pages[i].extract_text() or ""
+            yield text
+        return
+
+    # The upload is written to disk once and workers read it from there, instead of every task
+    # pickling the whole file over IPC
+    # (uuid in the name: a path is never reused while a worker may still hold a reader for it)
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix=f"resume-{uuid.uuid4().hex}-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    pool = parse_pool()
+    futures = [pool.submit(pdf_page_texts, path, lo, min(lo + PAGES_PER_TASK, n_pages))
+               for lo in range(start, n_pages, PAGES_PER_TASK)]
+    try:
+        for future in futures:
+            with stage("pdf_parse", rows=PAGES_PER_TASK):
+                texts = future.result()
+            yield from texts
+    finally:
+        # Closing the generator early (enough skills found) drops the pages not parsed yet
+        for future in futures:
+            future.cancel()
+        # PdfReader reads the whole file when opened, so removing it under a running task is safe
+        os.remove(path)
+
+def iter_docx_paragraphs(data, start=0, max_pages=MAX_PAGES):
+    with stage("docx_parse"):
+        paragraphs = docx.Document(io.BytesIO(data)).paragraphs
+    for p in paragraphs[start:max_pages * 10]:
+        yield p.text
+
+def iter_resume_text(file, name, max_pages=MAX_PAGES, max_bytes=MAX_BYTES, workers=PARSE_WORKERS):
+    """Yield a resume's text one page (PDF) or paragraph (DOCX) at a time.
+
+    Chunks already parsed for the same file contents are replayed from the cache; parsing resumes
+    where an earlier, early-stopped read left off.
+    """
+    data = read_capped(file, max_bytes)
+    is_pdf = name.lower().endswith(".pdf")
+    key = (hashlib.sha256(data).hexdigest(), is_pdf, max_pages)
+    with _cache_lock:
+        entry = _text_cache.setdefault(key, {"chunks": [], "complete": False})
+        _text_cache.move_to_end(key)
+        while len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+        chunks = list(entry["chunks"])
+    yield from chunks
+    if entry["complete"]:
+        return
+
+    parser = iter_pdf_pages(data, len(chunks), max_pages, workers) if is_pdf else \
+        iter_docx_paragraphs(data, len(chunks), max_pages)
+    for i, chunk in enumerate(parser, len(chunks)):
+        with _cache_lock:
+            if len(entry["chunks"]) == i:
+                entry["chunks"].append(chunk)
+        yield chunk
+    entry["complete"] = True
+
+def extract_text(file, name, **caps):
+    return " ".join(iter_resume_text(file, name, **caps))
+
+
+# --------------------------
+# Skill extraction
+# --------------------------
+def extract_skills_from_chunks(chunks, matcher, enough_skills=None):
+    """Skills found in a stream of text chunks, reading no further once enough_skills were found.
+
+    Each chunk is matched on its raw words and on their lemmas ("databases" -> "database"); the last
+    words of the previous chunk are carried over so a skill phrase split across chunks still matches.
+    spaCy is only loaded here, on the first resume.
+    """
+    raw, lemma = {}, {}
+    carry = max(matcher.max_words - 1, 0)
+    raw_tail, lemma_tail = [], []
+    for chunk in chunks:
+        chunk = chunk.lower()
+        with stage("skill_match"):
+            tokens = tokenize(chunk)
+            raw.update(dict.fromkeys(matcher.find(raw_tail + tokens)))
+        with stage("spacy_lemmatize") as s:
+            doc = get_nlp()(chunk)
+            s.rows = len(doc)
+            lemma_tokens = tokenize(" ".join(token.lemma_.lower() for token in doc if not token.is_space))
+        with stage("skill_match_lemmas"):
+            lemma.update(dict.fromkeys(matcher.find(lemma_tail + lemma_tokens)))
+        if carry:
+            raw_tail, lemma_tail = (raw_tail + tokens)[-carry:], (lemma_tail + lemma_tokens)[-carry:]
+        if enough_skills is not None and len(raw.keys() | lemma.keys()) >= enough_skills:
+            break
+    if hasattr(chunks, "close"):
+        chunks.close()
+    return list(dict.fromkeys(list(raw) + list(lemma)))
+
+def nlp_extract_skills_from_text(text, matcher):
+    return extract_skills_from_chunks([text], matcher)
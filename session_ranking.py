@@ -0,0 +1,109 @@
+# session_ranking.py - Per-session running scores, updated by skill deltas instead of re-ranking
+#
+# A user refining their skills changes one or two of them per rerun. SessionRanker keeps, for every
+# job, the raw dot product with the user's term counts and the number of the user's skills it
+# requires. Adding or removing a skill only walks that skill's term and skill posting lists; top-k
+# selection then reads only the jobs on the current skills' posting lists (a per-job count of live
+# posting-list hits drops a job once its last contributing skill is removed), never the whole
+# catalogue. Scores go through JobIndex.blend, so rankings match JobIndex.select_rows (exact mode).
+import numpy as np
+
+from instrumentation import stage
+from job_index import posting_list
+
+
+class SessionRanker:
+    """Running scores for one user session over a JobIndex.
+
+    Holds O(len(job_index)) arrays (float64 dot products, int32 overlaps and hit counts), so it is
+    meant for st.session_state, one per session, rebuilt when the catalogue version changes.
+    """
+
+    def __init__(self, job_index):
+        self.job_index = job_index
+        self.skills = set()
+        n = len(job_index)
+        self.dots = np.zeros(n)
+        self.overlap = np.zeros(n, dtype=np.int32)
+        # Posting lists of the current skills each job is on; > 0 = candidate
+        self.hits = np.zeros(n, dtype=np.int32)
+        self.rows = np.zeros(0, dtype=np.int64)   # sorted candidates as of the last select_rows
+        self.new_rows = []                        # jobs that became candidates since then
+        self.listed = np.zeros(n, dtype=bool)     # in self.rows or self.new_rows
+        self.has_terms = job_index.job_vectors is not None and job_index.vectorizer is not None
+        self.user_terms = {}  # term id -> count in the user's skills
+
+    def apply(self, skill, sign):
+        index = self.job_index
+        rows = []
+        if skill in index.skill_ids:
+            jobs = posting_list(index.skill_postings, index.skill_ids[skill])
+            self.overlap[jobs] += sign
+            rows.append(jobs)
+        if self.has_terms:
+            # The user vector of ", ".join(skills) is the sum of the skills' own term counts
+            counts = index.vectorizer.transform([skill])
+            postings = index.term_postings
+            for term, count in zip(counts.indices, counts.data):
+                lo, hi = postings.indptr[term], postings.indptr[term + 1]
+                jobs = postings.indices[lo:hi]
+                self.dots[jobs] += sign * count * postings.data[lo:hi]
+                self.user_terms[term] = self.user_terms.get(term, 0) + sign * count
+                rows.append(jobs)
+        for jobs in rows:
+            self.hits[jobs] += sign
+            if sign > 0:
+                new = jobs[~self.listed[jobs]]
+                self.listed[new] = True
+                self.new_rows.append(new)
+
+    def update(self, user_skill_tokens):
+        """Move the running scores to a new skill list; returns the number of skills changed."""
+        skills = set(user_skill_tokens)
+        added, removed = skills - self.skills, self.skills - skills
+        with stage("session_delta", rows=len(added) + len(removed)):
+            for skill in removed:
+                self.apply(skill, -1)
+            for skill in added:
+                self.apply(skill, 1)
+        self.skills = skills
+        return len(added) + len(removed)
+
+    def candidate_rows(self):
+        # Jobs on at least one current posting list, sorted; costs the size of that set
+        rows = self.rows
+        if self.new_rows:
+            # Two sorted runs: the stable sort (timsort) merges them in linear time
+            rows = np.sort(np.concatenate([rows, np.sort(np.concatenate(self.new_rows))]), kind="stable")
+            self.new_rows = []
+        live = self.hits[rows] > 0
+        self.listed[rows[~live]] = False
+        self.rows = rows[live]
+        return self.rows
+
+    def candidate_scores(self, rows):
+        """(overlap, match_percent, ml_score, final_score) of the given rows, as JobIndex.scores gives them."""
+        index = self.job_index
+        tokens = sorted(self.skills)
+        terms = None
+        if self.has_terms and tokens:
+            live = {t: c for t, c in self.user_terms.items() if c}
+            terms = np.fromiter(live, dtype=np.int64, count=len(live)), np.fromiter(live.values(), dtype=np.int64,
+                                                                                     count=len(live))
+        overlap = self.overlap[rows]
+        norms = None if terms is None else index.job_norms()[rows]
+        return (overlap, *index.blend(tokens, index.user_skill_ids(tokens), terms, overlap, self.dots[rows], norms))
+
+    def select_rows(self, user_skill_tokens, k, filters=None):
+        """JobIndex.select_rows(user_skill_tokens, k, filters) from the running scores."""
+        self.update(user_skill_tokens)
+        index = self.job_index
+        with stage("candidates") as s:
+            allowed = index.candidate_rows(filters)
+            matching = self.candidate_rows()
+            if allowed is not None:
+                matching = matching[np.isin(matching, allowed, assume_unique=True)]
+            s.rows = len(matching)
+        final_score = self.candidate_scores(matching)[-1]
+        with stage("select_top_k", rows=len(matching)):
+            return index.pick_winners(matching, final_score, k, allowed)
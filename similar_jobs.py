@@ -0,0 +1,64 @@
+# similar_jobs.py - Top-M job-to-job neighbour index (replaces the dense N x N similarity matrix)
+import numpy as np
+
+NEIGHBOURS_FILE = "similar_jobs.npz"
+
+
+def top_neighbours(row_scores, row_cols, self_index, n_jobs, m):
+    """Best m (column, score) pairs of one sparse similarity row, excluding self.
+
+    Ties are broken by lower job index; rows with fewer than m non-zero neighbours are padded
+    with zero-similarity jobs in index order, like a full stable sort would.
+    """
+    keep = row_cols != self_index
+    row_scores, row_cols = row_scores[keep], row_cols[keep]
+    if len(row_scores) > m:
+        kth = np.partition(row_scores, len(row_scores) - m)[len(row_scores) - m]
+        keep = row_scores >= kth
+        row_scores, row_cols = row_scores[keep], row_cols[keep]
+    order = np.lexsort((row_cols, -row_scores))[:m]
+    cols, scores = list(row_cols[order]), list(row_scores[order])
+
+    used = set(cols)
+    used.add(self_index)
+    j = 0
+    while len(cols) < min(m, n_jobs - 1):
+        if j not in used:
+            cols.append(j)
+            scores.append(0.0)
+        j += 1
+    return cols, scores
+
+def build_neighbours(tfidf_matrix, m=20, block_size=512, rows=None):
+    """Top-m cosine neighbours of every job, computed one block of rows at a time.
+
+    tfidf_matrix rows must be L2 normalised (TfidfVectorizer's default), so cosine is a dot product.
+    Memory stays O(block_size x N) for the sparse block product plus O(N x m) for the result.
+    rows=(first, stop) only computes the neighbours of those jobs (see parallel_build.py).
+    """
+    X = tfidf_matrix.tocsr()
+    n_jobs = X.shape[0]
+    first, stop = rows or (0, n_jobs)
+    width = min(m, max(n_jobs - 1, 0))
+    indices = np.full((stop - first, width), -1, dtype=np.int32)
+    scores = np.zeros((stop - first, width), dtype=np.float32)
+    XT = X.T.tocsc()
+    for start in range(first, stop, block_size):
+        block = (X[start:min(start + block_size, stop)] @ XT).tocsr()
+        for r in range(block.shape[0]):
+            lo, hi = block.indptr[r], block.indptr[r + 1]
+            cols, vals = top_neighbours(block.data[lo:hi], block.indices[lo:hi], start + r, n_jobs, width)
+            indices[start - first + r] = cols
+            scores[start - first + r] = vals
+    return indices, scores
+
+def save_neighbours(indices, scores, path=NEIGHBOURS_FILE):
+    np.savez(path, indices=indices, scores=scores)
+
+def load_neighbours(path=NEIGHBOURS_FILE):
+    with np.load(path) as f:
+        return f["indices"], f["scores"]
+
+def similar_jobs(indices, scores, job_index, n=5):
+    """Top n (job index, similarity) pairs for one job in O(n)."""
+    return list(zip(indices[job_index][:n].tolist(), scores[job_index][:n].tolist()))
@@ -0,0 +1,55 @@
+# skill_extractor.py - Phrase-trie skill matcher over the job skill vocabulary
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_END = ""  # trie key marking the end of a skill phrase (tokens are never empty)
+
+
+def tokenize(text):
+    # Keeps skills like "c++", "c#" and "node.js" in one token; drops sentence-final dots
+    return [t.rstrip(".") for t in TOKEN_RE.findall(str(text).lower())]
+
+
+class SkillMatcher:
+    """Token trie built once from the skill vocabulary.
+
+    find() walks the text once, following the trie from each token, so the cost is
+    O(tokens x longest skill phrase) no matter how many skills are in the vocabulary.
+    """
+
+    def __init__(self, skills, stop_words=()):
+        self.trie = {}
+        self.n_skills = 0
+        self.max_words = 0
+        for skill in skills:
+            words = tokenize(skill)
+            # A one-word skill that is also a stop word ("it", "all"...) would match everywhere
+            if not words or (len(words) == 1 and words[0] in stop_words):
+                continue
+            node = self.trie
+            for w in words:
+                node = node.setdefault(w, {})
+            if _END not in node:
+                node[_END] = skill
+                self.n_skills += 1
+            self.max_words = max(self.max_words, len(words))
+
+    def __len__(self):
+        return self.n_skills
+
+    def find(self, tokens):
+        """Distinct skills whose phrase occurs in tokens, in order of first occurrence."""
+        found = {}
+        n = len(tokens)
+        for i in range(n):
+            node = self.trie
+            j = i
+            while j < n and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    found[node[_END]] = None
+        return list(found)
+
+    def extract(self, text):
+        return self.find(tokenize(text))
@@ -0,0 +1,70 @@
+# synthetic_catalogue.py - Seeded generator of realistic job catalogues for benchmarking
+#
+#   python synthetic_catalogue.py 100000 -o bench_data/jobs_100000.csv --seed 0
+#
+# Every column is sampled from the empirical distribution of a real catalogue (jobs_cleaned.csv by
+# default): titles, companies, locations, levels and industries by frequency, salaries with a little
+# noise, and per job a skill count and skills drawn by their document frequency.
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from job_index import detect_skill_column, parse_skills
+
+SOURCE_CSV = "jobs_cleaned.csv"
+
+
+def value_distribution(series):
+    counts = series.value_counts()
+    return counts.index.to_numpy(dtype=object), (counts / counts.sum()).to_numpy()
+
+def generate_catalogue(n_jobs, seed=0, source=SOURCE_CSV):
+    """DataFrame of n_jobs synthetic postings with the same columns as `source`."""
+    rng = np.random.default_rng(seed)
+    src = pd.read_csv(source).fillna("")
+    skill_col = detect_skill_column(src)
+    jobs = {}
+    for col in src.columns:
+        if col == skill_col:
+            continue
+        if pd.api.types.is_numeric_dtype(src[col]):
+            values = src[col].to_numpy(dtype=float)
+            noise = rng.normal(1.0, 0.05, n_jobs)
+            jobs[col] = np.round(rng.choice(values, n_jobs) * noise, -2)
+        else:
+            values, p = value_distribution(src[col].astype(str))
+            jobs[col] = values[rng.choice(len(values), n_jobs, p=p)]
+
+    # Skills: how many per job, then which ones, both as in the source
+    job_skills = src[skill_col].map(parse_skills)
+    lengths, length_p = value_distribution(job_skills.str.len())
+    skills, skill_p = value_distribution(job_skills.explode().dropna())
+    n_skills = np.minimum(lengths[rng.choice(len(lengths), n_jobs, p=length_p)].astype(np.int64), len(skills))
+    drawn = skills[rng.choice(len(skills), int(n_skills.sum()), p=skill_p)]
+    offsets = np.concatenate([[0], np.cumsum(n_skills)])
+    jobs[skill_col] = [", ".join(dict.fromkeys(drawn[offsets[i]:offsets[i + 1]])) for i in range(n_jobs)]
+    return pd.DataFrame(jobs, columns=src.columns)
+
+def catalogue_csv(n_jobs, seed=0, data_dir="bench_data", source=SOURCE_CSV):
+    """Path of a generated catalogue CSV, writing it on first use."""
+    path = os.path.join(data_dir, f"jobs_{n_jobs}_seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        generate_catalogue(n_jobs, seed, source).to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic job catalogue CSV.")
+    parser.add_argument("n_jobs", type=int)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=SOURCE_CSV)
+    args = parser.parse_args()
+
+    output = args.output or f"jobs_{args.n_jobs}_seed{args.seed}.csv"
+    generate_catalogue(args.n_jobs, args.seed, args.source).to_csv(output, index=False)
+    print(f"Wrote {args.n_jobs} jobs to {output}")
@@ -3,27 +3,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io, os, pickle, PyPDF2, docx, nltk, spacy
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import io
+from contextlib import nullcontext
+import os
 import matplotlib.pyplot as plt
-from collections import Counter
 import requests
 from streamlit_lottie import st_lottie  # 🔥 for animation
+from instrumentation import request, stage
+from job_index import JOB_FILES, detect_skill_column, load_jobs_df, ranking_columns
+from model_bundle import BUNDLE_DIR, open_job_index
+from query_cache import QueryCache, normalize_skills, query_key
+from skill_extractor import SkillMatcher
+from nlp_resources import STOP_WORDS
+from resume_parser import ENOUGH_SKILLS, extract_skills_from_chunks, iter_resume_text
+from session_ranking import SessionRanker
 
 # --------------------------
 # Setup
 # --------------------------
-nltk.download('stopwords', quiet=True)
-stop_words = set(stopwords.words('english'))
-
-try:
-    nlp = spacy.load("en_core_web_sm")
-except Exception:
-    from spacy.lang.en import English
-    nlp = English()
-
 st.set_page_config(page_title="💼 AI Job Recommender", page_icon="💡", layout="wide")
 
 # --------------------------
@@ -61,76 +58,32 @@ def load_lottie_url(url: str):
     if r.status_code != 200: return None
     return r.json()
 
-def detect_skill_column(df):
-    for col in df.columns:
-        if "skill" in col.lower() or "required" in col.lower():
-            return col
-    for col in ["required_skills","skills","skills_required","skillset"]:
-        if col in df.columns: return col
-    return None
+def catalogue_stamp():
+    # Changes whenever a job file or the model bundle is rewritten, so cached resources reload
+    paths = [*JOB_FILES, os.path.join(BUNDLE_DIR, "manifest.json")]
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
 
-def load_jobs_df():
-    for name in ["jobs_cleaned.csv","jobs_cleaned_small.csv","jobs.csv"]:
-        if os.path.exists(name):
-            try: return pd.read_csv(name).fillna("")
-            except: continue
-    return pd.DataFrame(columns=["job_title","company","location","required_skills","description"])
+# One entry each: a new stamp (append / retire / rebuild) replaces the old index instead of piling up.
+# The catalogue is read inside, so reruns that hit the cache decode nothing.
+@st.cache_resource(max_entries=1)
+def load_job_index(stamp):
+    jobs_df, jobs_path = load_jobs_df(ranking_columns())
+    return open_job_index(jobs_df, detect_skill_column(jobs_df), jobs_path)
 
 @st.cache_resource
-def load_vectorizer_and_job_vectors(df, skill_col):
-    vectorizer = None
-    if os.path.exists("vectorizer.pkl"):
-        with open("vectorizer.pkl","rb") as f:
-            vectorizer = pickle.load(f)
-    else:
-        vectorizer = CountVectorizer(stop_words="english")
-
-    if skill_col:
-        texts = df[skill_col].astype(str).fillna("")
-        job_vectors = vectorizer.fit_transform(texts)
-        with open("vectorizer.pkl","wb") as f:
-            pickle.dump(vectorizer,f)
-    else:
-        job_vectors = None
-    return vectorizer, job_vectors
-
-def extract_text_from_pdf(file):
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for p in reader.pages:
-        t = p.extract_text()
-        if t: text += t + " "
-    return text
+def get_query_cache():
+    return QueryCache(maxsize=2048, ttl=900)
 
-def extract_text_from_docx(file):
-    file_bytes = io.BytesIO(file.read())
-    doc = docx.Document(file_bytes)
-    return " ".join([p.text for p in doc.paragraphs])
-
-def nlp_extract_skills_from_text(text, skills_list):
-    text = text.lower()
-    doc = nlp(text)
-    tokens = [token.lemma_.lower() for token in doc if token.is_alpha and token.text.lower() not in stop_words]
-    extracted = []
-    for skill in skills_list:
-        for tok in tokens:
-            if skill in tok or tok in skill:
-                extracted.append(skill)
-                break
-    return list(set(extracted))
-
-def calculate_match(job_skill_text, user_skill_tokens):
-    job_tokens = [s.strip().lower() for s in str(job_skill_text).split(",") if s.strip()]
-    matched = set(user_skill_tokens).intersection(set(job_tokens))
-    match_percent = round((len(matched)/len(user_skill_tokens)*100) if user_skill_tokens else 0, 2)
-    return matched, match_percent
+@st.cache_resource(max_entries=1)
+def load_skill_matcher(_job_index, stamp):
+    return SkillMatcher(_job_index.skill_names, STOP_WORDS)
 
 # --------------------------
 # Load ML Components
 # --------------------------
-jobs_df = load_jobs_df()
-skill_col = detect_skill_column(jobs_df)
-vectorizer, job_vectors = load_vectorizer_and_job_vectors(jobs_df, skill_col)
+stamp = catalogue_stamp()
+job_index = load_job_index(stamp)
+query_cache = get_query_cache()
 
 # --------------------------
 # Header + Animation + Images
@@ -157,119 +110,182 @@ with col2:
 st.write("")
 
 # --------------------------
-# Input Section
+# Stage timings (JOBREC_PROFILE=1 traces every run; the sidebar toggle traces this session)
 # --------------------------
-option = st.radio("Choose Input Method", ["✍️ Enter Skills", "📂 Upload Resume"], horizontal=True)
-user_skills = []
-skills_list_small = ["python","java","sql","excel","finance","machine learning","nlp","aws","azure",
-                     "communication","pandas","numpy","tensorflow","deep learning","problem solving"]
+with st.sidebar:
+    debug_panel = st.checkbox("🛠 Show stage timings", value=False)
+trace = request("recommendation", enabled=debug_panel or None)
+# `with` so the trace is finished (and tracemalloc stopped) even when the run raises or Streamlit
+# interrupts it for a rerun
+with trace if trace else nullcontext():
+    # --------------------------
+    # Input Section
+    # --------------------------
+    option = st.radio("Choose Input Method", ["✍️ Enter Skills", "📂 Upload Resume"], horizontal=True)
+    user_skills = []
 
-if option == "✍️ Enter Skills":
-    skill_input = st.text_area("Enter your skills (comma separated):", placeholder="python, sql, excel, communication")
-    if skill_input:
-        user_skills = [s.strip().lower() for s in skill_input.split(",") if s.strip()]
-elif option == "📂 Upload Resume":
-    uploaded_file = st.file_uploader("Upload your resume (pdf/docx)", type=["pdf","docx"])
-    if uploaded_file:
-        full_text = extract_text_from_pdf(uploaded_file) if uploaded_file.name.endswith(".pdf") else extract_text_from_docx(uploaded_file)
-        user_skills = nlp_extract_skills_from_text(full_text, skills_list_small)
-        st.success(f"Extracted Skills: {', '.join(user_skills)}")
+    if option == "✍️ Enter Skills":
+        skill_input = st.text_area("Enter your skills (comma separated):", placeholder="python, sql, excel, communication")
+        if skill_input:
+            user_skills = list(dict.fromkeys(s.strip().lower() for s in skill_input.split(",") if s.strip()))
+    elif option == "📂 Upload Resume":
+        uploaded_file = st.file_uploader("Upload your resume (pdf/docx)", type=["pdf","docx"])
+        if uploaded_file:
+            # Pages stream in from parallel workers; reading stops once enough skills are found
+            try:
+                user_skills = extract_skills_from_chunks(iter_resume_text(uploaded_file, uploaded_file.name),
+                                                         load_skill_matcher(job_index, stamp), ENOUGH_SKILLS)
+                st.success(f"Extracted Skills: {', '.join(user_skills)}")
+            except ValueError as e:
+                st.error(str(e))
 
-# --------------------------
-# ML Matching Logic
-# --------------------------
-def rank_jobs(user_skills_tokens):
-    df = jobs_df.copy()
-    matched_list, match_percent_list = [], []
-    for idx, row in df.iterrows():
-        matched, percent = calculate_match(row.get(skill_col,""), user_skills_tokens)
-        matched_list.append(", ".join(matched))
-        match_percent_list.append(percent)
-    df["Matched Skills"] = matched_list
-    df["Match %"] = match_percent_list
+    # --------------------------
+    # ML Matching Logic
+    # --------------------------
+    def rank_jobs(user_skills_tokens):
+        return job_index.rank_jobs(user_skills_tokens)
 
-    if job_vectors is not None and vectorizer is not None and len(user_skills_tokens)>0:
-        user_text = ", ".join(user_skills_tokens)
-        user_vec = vectorizer.transform([user_text])
-        sim_scores = cosine_similarity(user_vec, job_vectors).flatten()
-        df["ML Score"] = sim_scores
-        df["Final Score"] = 0.6*df["ML Score"] + 0.4*(df["Match %"]/100)
-    else:
-        df["ML Score"] = 0.0
-        df["Final Score"] = df["Match %"]/100
+    def session_ranker():
+        # Running scores of this session's skills: editing one skill re-scores only that skill's postings
+        ranker = st.session_state.get("session_ranker")
+        if ranker is None or ranker.job_index is not job_index:
+            ranker = st.session_state["session_ranker"] = SessionRanker(job_index)
+        return ranker
 
-    df = df.sort_values(by="Final Score", ascending=False)
-    return df
+    def top_k(user_skills_tokens, k=10, filters=None):
+        # Served from the process-wide cache; the same skills in any order share one entry.
+        # Returns (top_jobs, analysis): the chart data is computed with the ranking and cached with it.
+        skills = list(normalize_skills(user_skills_tokens))
 
-# --------------------------
-# Display Results
-# --------------------------
-if user_skills:
-    ranked = rank_jobs(user_skills)
-    if ranked.empty:
-        st.warning("No jobs matched. Try adding more relevant skills.")
-    else:
-        st.markdown("## 🔍 Top Job Recommendations")
-        top_jobs = ranked.head(10)
-        for _, row in top_jobs.iterrows():
-            st.markdown(f"""
-            <div class="job-card">
-                <h4>{row.get('job_title','N/A')}</h4>
-                <p>🏢 {row.get('company','Unknown')} | 📍 {row.get('location','Remote')}</p>
-                <p><span class="pill">✅ Matched: {row['Matched Skills']}</span>
-                <span class="pill">🤖 ML Score: {row['ML Score']:.2f}</span>
-                <span class="pill">📊 Final: {row['Final Score']:.2f}</span></p>
-            </div>
-            """, unsafe_allow_html=True)
+        def compute():
+            # Approximate mode (JOBREC_ANN_PROBES) ranks from the LSH shortlist instead
+            ranker = job_index if job_index.ann_probes else session_ranker()
+            rows = ranker.select_rows(skills, k, filters)
+            return job_index.results_frame(skills, rows), job_index.analysis(skills, rows)
+
+        with stage("rank", rows=len(job_index)):
+            return query_cache.get_or_compute(query_key(skills, k, filters), job_index.version, compute)
+
+    # --------------------------
+    # Analysis charts
+    # --------------------------
+    def figure_png(fig):
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor(), bbox_inches="tight")
+        plt.close(fig)
+        return buf.getvalue()
 
-        # --------------------------
-        # Visualization Section
-        # --------------------------
-        st.write("")
-        if st.button("📊 View Analysis"):
-            st.markdown("### 📈 Job Matching Analysis")
+    @st.cache_resource(max_entries=256)
+    def analysis_figures(chart_key, _analysis):
+        # Matplotlib charts as PNG bytes, drawn once per (catalogue version, query)
+        pngs = []
+        fig1, ax1 = plt.subplots(facecolor="#0e1117")
+        ax1.set_facecolor("#0e1117")
+        ax1.pie(
+            [_analysis["matched_total"], _analysis["unmatched_total"]],
+            labels=["Matched", "Unmatched"],
+            autopct="%1.1f%%",
+            startangle=90,
+            colors=["#00d6a6", "#d946ef"],
+            textprops={"color": "white", "fontsize": 12}
+        )
+        ax1.axis("equal")
+        pngs.append(figure_png(fig1))
 
-            matched_total = sum([len(str(x).split(",")) for x in top_jobs["Matched Skills"]])
-            unmatched_total = max(0, len(user_skills)*len(top_jobs) - matched_total)
-            fig1, ax1 = plt.subplots(facecolor="#0e1117")
-            ax1.set_facecolor("#0e1117")
-            ax1.pie(
-                [matched_total, unmatched_total],
-                labels=["Matched", "Unmatched"],
-                autopct="%1.1f%%",
-                startangle=90,
-                colors=["#00d6a6", "#d946ef"],
-                textprops={"color": "white", "fontsize": 12}
-            )
-            ax1.axis("equal")
-            st.pyplot(fig1)
+        fig2, ax2 = plt.subplots(facecolor="#0e1117")
+        ax2.set_facecolor("#0e1117")
+        ax2.bar(_analysis["labels"], _analysis["match_percent"], color="#00d6a6", alpha=0.8)
+        ax2.set_xlabel("Job Title", color="white")
+        ax2.set_ylabel("Match %", color="white")
+        ax2.set_title("Skill Match Percentage per Job", color="white")
+        ax2.tick_params(axis="x", colors="white", rotation=45)
+        ax2.tick_params(axis="y", colors="white")
+        pngs.append(figure_png(fig2))
 
-            fig2, ax2 = plt.subplots(facecolor="#0e1117")
-            ax2.set_facecolor("#0e1117")
-            ax2.bar(top_jobs["job_title"], top_jobs["Match %"], color="#00d6a6", alpha=0.8)
-            ax2.set_xlabel("Job Title", color="white")
-            ax2.set_ylabel("Match %", color="white")
-            ax2.set_title("Skill Match Percentage per Job", color="white")
-            ax2.tick_params(axis="x", colors="white", rotation=45)
-            ax2.tick_params(axis="y", colors="white")
-            st.pyplot(fig2)
+        if len(_analysis["matched_skills"]):
+            fig3, ax3 = plt.subplots(facecolor="#0e1117")
+            ax3.set_facecolor("#0e1117")
+            ax3.barh(_analysis["matched_skills"], _analysis["skill_counts"], color="#5ef3d9")
+            ax3.set_xlabel("Frequency", color="white")
+            ax3.set_ylabel("Skills", color="white")
+            ax3.set_title("Matched Skill Frequency Across Top Jobs", color="white")
+            ax3.tick_params(axis="x", colors="white")
+            ax3.tick_params(axis="y", colors="white")
+            pngs.append(figure_png(fig3))
+        return pngs
 
-            all_matched_skills = [skill.strip() for sublist in top_jobs["Matched Skills"] for skill in str(sublist).split(",") if skill.strip()]
-            freq = Counter(all_matched_skills)
-            if freq:
-                fig3, ax3 = plt.subplots(facecolor="#0e1117")
-                ax3.set_facecolor("#0e1117")
-                skills, counts = zip(*freq.items())
-                ax3.barh(skills, counts, color="#5ef3d9")
-                ax3.set_xlabel("Frequency", color="white")
-                ax3.set_ylabel("Skills", color="white")
-                ax3.set_title("Matched Skill Frequency Across Top Jobs", color="white")
-                ax3.tick_params(axis="x", colors="white")
-                ax3.tick_params(axis="y", colors="white")
-                st.pyplot(fig3)
+    def native_analysis(analysis):
+        # Streamlit's own charts: no figure rendering on the server
+        total = analysis["matched_total"] + analysis["unmatched_total"]
+        c1, c2 = st.columns(2)
+        c1.metric("✅ Matched", analysis["matched_total"], f"{analysis['matched_total'] / total:.1%}" if total else None)
+        c2.metric("❌ Unmatched", analysis["unmatched_total"])
+        st.markdown("**Skill Match Percentage per Job**")
+        st.bar_chart(pd.DataFrame({"Match %": analysis["match_percent"]}, index=analysis["labels"]), color="#00d6a6")
+        if len(analysis["matched_skills"]):
+            st.markdown("**Matched Skill Frequency Across Top Jobs**")
+            st.bar_chart(pd.DataFrame({"Frequency": analysis["skill_counts"]}, index=analysis["matched_skills"]),
+                         color="#5ef3d9", horizontal=True)
+
+    # --------------------------
+    # Filters
+    # --------------------------
+    filters = {}
+    with st.sidebar:
+        st.markdown("### 🎯 Filters")
+        for facet, label in [("location", "📍 Location"), ("experience_level", "🎓 Experience Level"),
+                             ("industry", "🏭 Industry")]:
+            values = job_index.facets.facet_values(facet)
+            selected = st.multiselect(label, values) if values else []
+            if selected:
+                filters[facet] = selected
+        if job_index.facets.salary is not None:
+            min_salary = st.number_input("💰 Minimum salary", min_value=0, value=0, step=5000)
+            if min_salary:
+                filters["salary_min"] = min_salary
+
+    # --------------------------
+    # Display Results
+    # --------------------------
+    if user_skills:
+        top_jobs, analysis = top_k(user_skills, 10, filters)
+        if top_jobs.empty:
+            st.warning("No jobs matched. Try adding more relevant skills or relaxing the filters.")
+        else:
+            st.markdown("## 🔍 Top Job Recommendations")
+            for _, row in top_jobs.iterrows():
+                st.markdown(f"""
+                <div class="job-card">
+                    <h4>{row.get('job_title','N/A')}</h4>
+                    <p>🏢 {row.get('company','Unknown')} | 📍 {row.get('location','Remote')}</p>
+                    <p><span class="pill">✅ Matched: {row['Matched Skills']}</span>
+                    <span class="pill">🤖 ML Score: {row['ML Score']:.2f}</span>
+                    <span class="pill">📊 Final: {row['Final Score']:.2f}</span></p>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # --------------------------
+            # Visualization Section
+            # --------------------------
+            st.write("")
+            chart_style = st.radio("Chart style", ["⚡ Native", "🎨 Matplotlib"], horizontal=True)
+            if st.button("📊 View Analysis"):
+                st.markdown("### 📈 Job Matching Analysis")
+                with stage("charts", rows=len(top_jobs)):
+                    if chart_style == "⚡ Native":
+                        native_analysis(analysis)
+                    else:
+                        chart_key = (job_index.version, query_key(user_skills, 10, filters))
+                        for png in analysis_figures(chart_key, analysis):
+                            st.image(png)
+
+    else:
+        st.info("👉 Start by entering your skills or uploading your resume.")
 
-else:
-    st.info("👉 Start by entering your skills or uploading your resume.")
+if trace and debug_panel:
+    with st.expander("🛠 Stage timings", expanded=True):
+        st.caption(f"Total {trace.seconds * 1000:.1f} ms")
+        st.dataframe(pd.DataFrame([s.to_dict() for s in trace.stages]), use_container_width=True)
 
 # --------------------------
 # --------------------------
@@ -0,0 +1,57 @@
+# update_catalogue.py - Incremental job catalogue updates without a full rebuild
+#
+#   python update_catalogue.py append new_jobs.csv      # clean + index new postings
+#   python update_catalogue.py retire 17 42 108         # tombstone rows by row id
+#   python update_catalogue.py compact                  # drop tombstones, refit vocabulary
+import argparse
+import time
+
+import pandas as pd
+
+from data_clean_preprocessing import clean_chunks
+from job_index import JOB_FILES
+from job_store import append_job_store, build_job_store, load_job_store, read_jobs_csv
+from model_bundle import BUNDLE_DIR, append_jobs, compact_bundle, retire_jobs
+
+# Compaction is worth it once this share of the appended terms was unknown to the vocabulary
+COMPACT_OOV_RATIO = 0.05
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append, retire or compact jobs in the model bundle.")
+    parser.add_argument("--csv", default=JOB_FILES[0], help="catalogue CSV the bundle was built from")
+    parser.add_argument("--bundle", default=BUNDLE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    append = sub.add_parser("append", help="append new postings from a raw CSV")
+    append.add_argument("new_jobs")
+    retire = sub.add_parser("retire", help="tombstone rows by row id")
+    retire.add_argument("row_ids", type=int, nargs="+")
+    sub.add_parser("compact", help="drop tombstoned rows and refit the vocabulary")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "append":
+        stats = {}
+        chunks = list(clean_chunks(pd.read_csv(args.new_jobs, chunksize=100_000, dtype=str), stats))
+        if not chunks:
+            parser.exit(message="No rows to append\n")
+        new_jobs = pd.concat(chunks)
+        store = load_job_store(args.csv, mmap_mode=None)
+        manifest = append_jobs(new_jobs, args.csv, args.bundle)
+        if store is not None:
+            append_job_store(store, new_jobs, args.csv)
+        print(f"Appended {len(new_jobs)} jobs ({stats.get('duplicates', 0)} duplicates dropped)")
+        if manifest["n_oov_terms"] > COMPACT_OOV_RATIO * manifest["n_appended_terms"]:
+            print("Many new terms are outside the vocabulary; run `python update_catalogue.py compact`")
+    elif args.command == "retire":
+        manifest = retire_jobs(args.row_ids, args.csv, args.bundle)
+        print(f"Retired {len(args.row_ids)} jobs")
+    else:
+        manifest = compact_bundle(args.csv, args.bundle)
+        build_job_store(read_jobs_csv(args.csv), args.csv)
+        print("Compacted catalogue and refitted the vocabulary")
+    print(f"{manifest['n_jobs']} jobs ({manifest.get('n_retired', 0)} retired) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()